@@ -0,0 +1,2 @@
+def following(request):
+    return {'followed_authors': getattr(request, 'following', ())}
@@ -0,0 +1,8 @@
+from posts.notifications import unread_count
+
+
+def unread(request):
+    user = request.user
+    if not user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: unread_count(user)}
@@ -0,0 +1,227 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 5,
+    'CHECK_AFTER': 30,
+    'MAX_IDLE': 300,
+}
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class Pool:
+    """Пул соединений процесса для одного алиаса базы.
+
+    Соединение берётся на первый запрос к базе и возвращается, когда
+    Django закрывает его в конце запроса (CONN_MAX_AGE = 0). Больше
+    MAX_SIZE соединений не открывается: остальные потоки ждут до TIMEOUT
+    секунд. Соединение, простоявшее дольше CHECK_AFTER секунд, перед
+    выдачей проверяется запросом SELECT 1; лишние сверх MIN_SIZE
+    закрываются после MAX_IDLE секунд простоя.
+    """
+
+    def __init__(self, options=None):
+        options = dict(DEFAULTS, **(options or {}))
+        self.min_size = options['MIN_SIZE']
+        self.max_size = options['MAX_SIZE']
+        self.timeout = options['TIMEOUT']
+        self.check_after = options['CHECK_AFTER']
+        self.max_idle = options['MAX_IDLE']
+        self.condition = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.idle = deque()
+        self.size = 0
+        self.metrics = dict.fromkeys((
+            'checkouts', 'created', 'waits', 'timeouts', 'failed_checks',
+            'discarded', 'wait_time', 'max_wait', 'peak',
+        ), 0)
+
+    def _check_fork(self):
+        # Соединения родителя после fork не закрываются — ими владеет
+        # он, — а просто забываются.
+        if self.pid != os.getpid():
+            self._reset()
+
+    def checkout(self, connect):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self.condition:
+            self._check_fork()
+            waited = False
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.metrics['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'Нет свободных соединений за {self.timeout} с '
+                        f'(максимум {self.max_size})')
+                waited = True
+                self.condition.wait(remaining)
+            self.metrics['checkouts'] += 1
+            if waited:
+                wait = time.monotonic() - start
+                self.metrics['waits'] += 1
+                self.metrics['wait_time'] += wait
+                self.metrics['max_wait'] = max(self.metrics['max_wait'], wait)
+            if self.idle:
+                connection, returned = self.idle.pop()
+            else:
+                connection, returned = None, None
+                self.size += 1
+            self.metrics['peak'] = max(self.metrics['peak'],
+                                       self.size - len(self.idle))
+        if connection is not None:
+            if (time.monotonic() - returned < self.check_after
+                    or self._healthy(connection)):
+                return connection
+            with self.condition:
+                self.metrics['failed_checks'] += 1
+            self._close(connection)
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.metrics['created'] += 1
+        return connection
+
+    def checkin(self, connection, reusable=True):
+        now = time.monotonic()
+        with self.condition:
+            if self.pid != os.getpid():
+                return
+            if reusable:
+                self.idle.append((connection, now))
+                connection = None
+            else:
+                self.size -= 1
+            stale = []
+            while (self.size > self.min_size and self.idle
+                   and now - self.idle[0][1] > self.max_idle):
+                stale.append(self.idle.popleft()[0])
+                self.size -= 1
+            self.condition.notify()
+        for old in stale + [connection]:
+            if old is not None:
+                self._close(old)
+
+    def fill(self, connect):
+        """Открывает соединения до MIN_SIZE."""
+        while True:
+            with self.condition:
+                self._check_fork()
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection = connect()
+            except Exception:
+                with self.condition:
+                    self.size -= 1
+                raise
+            with self.condition:
+                self.metrics['created'] += 1
+                self.idle.appendleft((connection, time.monotonic()))
+                self.condition.notify()
+
+    def close_all(self):
+        with self.condition:
+            idle, self.idle = self.idle, deque()
+            self.size -= len(idle)
+        for connection, _ in idle:
+            self._close(connection)
+
+    @staticmethod
+    def _healthy(connection):
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def _close(self, connection):
+        with self.condition:
+            self.metrics['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            logger.debug('Соединение уже закрыто', exc_info=True)
+
+    def stats(self):
+        with self.condition:
+            in_use = self.size - len(self.idle)
+            return dict(
+                self.metrics,
+                size=self.size,
+                idle=len(self.idle),
+                in_use=in_use,
+                max_size=self.max_size,
+                saturation=in_use / self.max_size,
+            )
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    # Пул привязан и к параметрам соединения: тестовый прогон, например,
+    # подменяет имя базы у того же алиаса.
+    key = (alias, repr(sorted(conn_params.items())))
+    with _lock:
+        if key not in _pools:
+            _pools[key] = Pool(options)
+        return _pools[key]
+
+
+def stats():
+    """Метрики всех пулов текущего процесса по алиасам."""
+    return {alias: pool.stats() for (alias, _), pool in _pools.items()}
+
+
+class PooledDatabaseWrapperMixin:
+    """Подмешивается к DatabaseWrapper бэкенда: сырые соединения берутся
+    из пула алиаса и возвращаются в него вместо закрытия. Настройки пула —
+    в ключе POOL описания базы в DATABASES."""
+
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        self.pool = get_pool(self.alias, conn_params,
+                             self.settings_dict.get('POOL'))
+        self.pool.fill(lambda: connect(conn_params))
+        return self.pool.checkout(lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Соединение в незавершённой транзакции или после ошибки в пул
+        # не возвращается.
+        reusable = not self.in_atomic_block and not self.errors_occurred
+        if reusable and not self.get_autocommit():
+            try:
+                self.connection.rollback()
+            except Exception:
+                reusable = False
+        self.pool.checkin(self.connection, reusable)
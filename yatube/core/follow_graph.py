@@ -0,0 +1,230 @@
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from posts.models import Follow
+
+VERSION_KEY = 'follow_graph:version'
+# Событие, по которому процессы перестраивают граф целиком, например
+# после bulk_create подписок в обход сигналов.
+RELOAD = None
+MISSING = object()
+EMPTY = array('i')
+
+
+def event_key(version):
+    return f'follow_graph:event:{version}'
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def publish(event):
+    """Записывает изменение в общий журнал в кеше; остальные процессы
+    применяют его при очередном опросе версии."""
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = 1
+        cache.set(VERSION_KEY, version, None)
+    cache.set(event_key(version), event,
+              settings.FOLLOW_GRAPH_EVENT_TIMEOUT)
+    return version
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def _insert(ids, value):
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        return False
+    ids.insert(index, value)
+    return True
+
+
+def _remove(ids, value):
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        del ids[index]
+        return True
+    return False
+
+
+class FollowGraph:
+    """Граф подписок в памяти процесса: для каждого пользователя
+    отсортированные массивы id авторов и id подписчиков.
+
+    Изменения из других процессов приходят через журнал в кеше: номер
+    версии и по ключу на событие. Применение событий идемпотентно,
+    поэтому повтор уже учтённого изменения безвреден.
+    """
+
+    def __init__(self):
+        self.following_ids = {}
+        self.follower_ids = {}
+        self.edges = 0
+        self.version = 0
+        self.checked = time.monotonic()
+        self.pending = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        graph = cls()
+        # Версия читается до выборки: событие, записанное во время
+        # загрузки, применится повторно и ничего не испортит.
+        graph.version = current_version()
+        # Без ORDER BY: SQLite не сортирует миллионы строк во временном
+        # индексе, массивы сортируются в памяти по одному.
+        rows = Follow.objects.order_by().values_list(
+            'user_id', 'author_id').iterator(
+                chunk_size=settings.FOLLOW_GRAPH_CHUNK_SIZE)
+        following = defaultdict(partial(array, 'i'))
+        followers = defaultdict(partial(array, 'i'))
+        for user_id, author_id in rows:
+            following[user_id].append(author_id)
+            followers[author_id].append(user_id)
+        for index in (following, followers):
+            for key, ids in index.items():
+                index[key] = array('i', sorted(set(ids)))
+        graph.following_ids = dict(following)
+        graph.follower_ids = dict(followers)
+        graph.edges = sum(map(len, graph.following_ids.values()))
+        return graph
+
+    def follows(self, user_id, author_id):
+        return _contains(self.following_ids.get(user_id, EMPTY), author_id)
+
+    def following(self, user_id):
+        return self.following_ids.get(user_id, EMPTY)
+
+    def followers(self, author_id):
+        return self.follower_ids.get(author_id, EMPTY)
+
+    def add(self, user_id, author_id):
+        with self.lock:
+            if _insert(self.following_ids.setdefault(user_id, array('i')),
+                       author_id):
+                _insert(self.follower_ids.setdefault(author_id, array('i')),
+                        user_id)
+                self.edges += 1
+
+    def remove(self, user_id, author_id):
+        with self.lock:
+            if _remove(self.following_ids.get(user_id, array('i')),
+                       author_id):
+                _remove(self.follower_ids.get(author_id, array('i')),
+                        user_id)
+                self.edges -= 1
+
+    def apply(self, event):
+        action, user_id, author_id = event
+        if action == 'add':
+            self.add(user_id, author_id)
+        else:
+            self.remove(user_id, author_id)
+
+    def refresh(self):
+        """Подтягивает чужие изменения не чаще FOLLOW_GRAPH_POLL_INTERVAL.
+        Возвращает False, если журнал потерян и граф нужно перестроить."""
+        now = time.monotonic()
+        if now - self.checked < settings.FOLLOW_GRAPH_POLL_INTERVAL:
+            return True
+        self.checked = now
+        version = current_version()
+        if version == self.version:
+            return True
+        if (version < self.version or version - self.version
+                > settings.FOLLOW_GRAPH_MAX_EVENTS):
+            return False
+        versions = range(self.version + 1, version + 1)
+        events = cache.get_many([event_key(number) for number in versions])
+        for number in versions:
+            event = events.get(event_key(number), MISSING)
+            if event is MISSING:
+                # Номер выдан, но событие ещё не записано — ждём до
+                # следующего опроса; если не появилось, журнал потерян.
+                if self.pending == number:
+                    return False
+                self.pending = number
+                return True
+            if event is RELOAD:
+                return False
+            self.apply(event)
+            self.version = number
+        return True
+
+    def memory(self):
+        """Байты, занятые словарями и массивами графа."""
+        total = 0
+        for index in (self.following_ids, self.follower_ids):
+            total += sys.getsizeof(index)
+            for key, ids in index.items():
+                total += sys.getsizeof(key) + sys.getsizeof(ids)
+        return total
+
+    def stats(self):
+        return {
+            'edges': self.edges,
+            'users': len(self.following_ids),
+            'authors': len(self.follower_ids),
+            'bytes': self.memory(),
+            'version': self.version,
+        }
+
+
+_graph = None
+_lock = threading.Lock()
+
+
+def get_graph():
+    """Граф текущего процесса: строится при первом обращении (или при
+    прогреве воркера) и перестраивается, если журнал изменений потерян."""
+    global _graph
+    graph = _graph
+    if graph is not None and graph.refresh():
+        return graph
+    with _lock:
+        if _graph is graph:
+            _graph = FollowGraph.load()
+        return _graph
+
+
+def reset():
+    global _graph
+    _graph = None
+
+
+def _apply(event):
+    if _graph is not None:
+        _graph.apply(event)
+    publish(event)
+
+
+def follow_added(user_id, author_id):
+    """Добавляет ребро после коммита: откаченная подписка не должна
+    попасть ни в граф процесса, ни в журнал для остальных."""
+    transaction.on_commit(partial(_apply, ('add', user_id, author_id)))
+
+
+def follow_removed(user_id, author_id):
+    transaction.on_commit(partial(_apply, ('remove', user_id, author_id)))
+
+
+def reload_all():
+    """Велит всем процессам перестроить граф из базы."""
+    reset()
+    publish(RELOAD)
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+
+from posts.models import Follow
+
+from .follow_graph import get_graph
+
+
+def following_key(user_id):
+    return f'following:{user_id}'
+
+
+def following_cache():
+    return caches[settings.FOLLOWING_CACHE]
+
+
+def invalidate_following(user_id):
+    following_cache().delete(following_key(user_id))
+
+
+class Following:
+    """Id авторов, на которых подписан пользователь. Загружаются при первом
+    обращении за запрос и кешируются в кеше FOLLOWING_CACHE до изменения
+    Follow. С FOLLOW_GRAPH ответы берутся из графа подписок в памяти
+    процесса."""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def ids(self):
+        if not self.user.is_authenticated:
+            return frozenset()
+        if settings.FOLLOW_GRAPH:
+            return get_graph().following(self.user.pk)
+        cache, key = following_cache(), following_key(self.user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(Follow.objects.filter(
+                user_id=self.user.pk).values_list('author_id', flat=True))
+            cache.set(key, ids, settings.FOLLOWING_CACHE_TIMEOUT)
+        return ids
+
+    def is_following(self, author):
+        author_id = getattr(author, 'pk', author)
+        if settings.FOLLOW_GRAPH and self.user.is_authenticated:
+            return get_graph().follows(self.user.pk, author_id)
+        return author_id in self.ids
+
+    __contains__ = is_following
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,70 @@
+import io
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Сводит сохранённые профили запросов по view: суммирует стеки '
+            '.folded и статистику .prof, печатает самые дорогие функции.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*',
+                            help='Имена view, например posts.main.')
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--output', help='Куда записать сводные <view>.folded/.prof.')
+
+    def handle(self, *args, **options):
+        root = settings.PROFILING_DIR
+        views = options['views'] or (
+            sorted(os.listdir(root)) if os.path.isdir(root) else [])
+        if options['output']:
+            os.makedirs(options['output'], exist_ok=True)
+        for view in views:
+            directory = os.path.join(root, view)
+            if not os.path.isdir(directory):
+                self.stderr.write(f'{view}: профилей нет')
+                continue
+            files = sorted(os.listdir(directory))
+            folded = [os.path.join(directory, name)
+                      for name in files if name.endswith('.folded')]
+            profiles = [os.path.join(directory, name)
+                        for name in files if name.endswith('.prof')]
+            self.stdout.write(
+                f'{view}: {len(folded)} выборочных, '
+                f'{len(profiles)} cProfile')
+            if folded:
+                self._folded(view, folded, options)
+            if profiles:
+                self._profiles(view, profiles, options)
+
+    def _folded(self, view, paths, options):
+        stacks = Counter()
+        for path in paths:
+            with open(path) as file:
+                for line in file:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    stacks[stack] += int(count)
+        total = sum(stacks.values()) or 1
+        own = Counter()
+        for stack, count in stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += count
+        for name, count in own.most_common(options['top']):
+            self.stdout.write(f'  {count / total:6.1%}  {name}')
+        if options['output']:
+            path = os.path.join(options['output'], f'{view}.folded')
+            with open(path, 'w') as file:
+                for stack, count in stacks.most_common():
+                    file.write(f'{stack} {count}\n')
+
+    def _profiles(self, view, paths, options):
+        stream = io.StringIO()
+        stats = pstats.Stats(*paths, stream=stream)
+        stats.sort_stats('cumulative').print_stats(options['top'])
+        self.stdout.write(stream.getvalue())
+        if options['output']:
+            stats.dump_stats(os.path.join(options['output'], f'{view}.prof'))
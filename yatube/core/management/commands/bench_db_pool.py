@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.utils import load_backend
+
+BACKENDS = {
+    'sqlite': ('django.db.backends.sqlite3', 'core.db.backends.sqlite3'),
+    'postgresql': ('django.db.backends.postgresql',
+                   'core.db.backends.postgresql'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Имитирует запросы из нескольких потоков к базе default: '
+            'соединение на запрос без пула и из пула. Выводит время на '
+            'запрос и метрики пула — ожидание и насыщение.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--queries', type=int, default=3)
+        parser.add_argument('--max-size', type=int, default=4)
+
+    def handle(self, *args, **options):
+        plain, pooled = BACKENDS[connection.vendor]
+        settings_dict = dict(connection.settings_dict, POOL={
+            'MIN_SIZE': 1, 'MAX_SIZE': options['max_size'], 'TIMEOUT': 30,
+        })
+        total = options['threads'] * options['requests']
+        for engine in (plain, pooled):
+            wrappers = []
+            threads = [
+                threading.Thread(target=self._work, args=(
+                    dict(settings_dict, ENGINE=engine), wrappers,
+                    options['requests'], options['queries']))
+                for _ in range(options['threads'])
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{engine}: {elapsed / total * 10 ** 6:.0f} мкс на запрос')
+            pool = getattr(wrappers[0], 'pool', None)
+            if pool is not None:
+                stats = pool.stats()
+                self.stdout.write(
+                    f'  соединений {stats["created"]}, пик занятых '
+                    f'{stats["peak"]}/{stats["max_size"]}, ожиданий '
+                    f'{stats["waits"]} из {stats["checkouts"]}, '
+                    f'ожидание всего {stats["wait_time"]:.2f} с, '
+                    f'максимум {stats["max_wait"] * 1000:.1f} мс, '
+                    f'таймаутов {stats["timeouts"]}')
+                pool.close_all()
+
+    @staticmethod
+    def _work(settings_dict, wrappers, requests, queries):
+        # Как и в Django, у каждого потока своя обёртка соединения.
+        wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+            settings_dict, alias='bench')
+        wrappers.append(wrapper)
+        for _ in range(requests):
+            with wrapper.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute('SELECT COUNT(*) FROM posts_group')
+                    cursor.fetchone()
+            wrapper.close()
@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.follow_graph import FollowGraph, reload_all
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает граф подписок в памяти с запросами к posts_follow: '
+            'время построения, память и задержку проверок. Недостающие '
+            'подписки между существующими пользователями добавляются '
+            'случайно. Используйте на копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edges', type=int, default=10_000_000)
+        parser.add_argument('--lookups', type=int, default=2000)
+        parser.add_argument('--batch', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.values_list('pk', flat=True))
+        self._fill(users, options['edges'], options['batch'])
+
+        start = time.perf_counter()
+        graph = FollowGraph.load()
+        elapsed = time.perf_counter() - start
+        stats = graph.stats()
+        self.stdout.write(
+            f'Рёбер: {stats["edges"]}, пользователей: {stats["users"]}, '
+            f'авторов: {stats["authors"]}; построение {elapsed:.1f} с, '
+            f'память {stats["bytes"] / 2 ** 20:.1f} МБ '
+            f'({stats["bytes"] / max(stats["edges"], 1):.1f} Б на ребро)')
+
+        pairs = [(random.choice(users), random.choice(users))
+                 for _ in range(options['lookups'])]
+        follows = Follow.objects.filter
+        checks = (
+            ('подписан ли', lambda user, author: follows(
+                user_id=user, author_id=author).exists(),
+             graph.follows),
+            ('на кого подписан', lambda user, author: list(follows(
+                user_id=user).values_list('author_id', flat=True)),
+             lambda user, author: graph.following(user)),
+            ('подписчики', lambda user, author: list(follows(
+                author_id=author).values_list('user_id', flat=True)),
+             lambda user, author: graph.followers(author)),
+        )
+        for title, database, memory in checks:
+            self.stdout.write(
+                f'{title:17} база {self._measure(database, pairs):8.1f} мкс, '
+                f'граф {self._measure(memory, pairs):6.2f} мкс')
+
+    def _fill(self, users, edges, batch):
+        missing = edges - Follow.objects.count()
+        if missing <= 0:
+            return
+        quote = connection.ops.quote_name
+        sql = (f'INSERT INTO {quote(Follow._meta.db_table)} '
+               f'({quote("user_id")}, {quote("author_id")}) VALUES (%s, %s)')
+        while missing > 0:
+            size = min(batch, missing)
+            rows = [(random.choice(users), random.choice(users))
+                    for _ in range(size)]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            missing -= size
+            self.stdout.write(f'Добавлено подписок: {edges - missing}')
+        # Строки вставлены в обход сигналов.
+        reload_all()
+
+    @staticmethod
+    def _measure(check, pairs):
+        start = time.perf_counter()
+        for user, author in pairs:
+            check(user, author)
+        return (time.perf_counter() - start) / len(pairs) * 10 ** 6
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.ratelimit import check
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет накладные расходы проверки лимитов на запрос с '
+            'текущим бэкендом кеша: по пользователю и по IP.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100_000)
+        parser.add_argument('--clients', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for number in range(options['clients']):
+            request = factory.post(
+                '/', REMOTE_ADDR=f'10.0.{number // 256}.{number % 256}')
+            request.user = User(pk=number)
+            requests.append(request)
+        self.stdout.write(f'Кеш: {settings.CACHES["default"]["BACKEND"]}')
+        for scope in settings.RATELIMITS:
+            start = time.perf_counter()
+            for number in range(options['requests']):
+                check(requests[number % len(requests)], scope)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{scope:15} {elapsed / options["requests"] * 10 ** 6:.1f} '
+                f'мкс на запрос')
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+# Выполняется в чистом процессе под -X importtime. Прирост RSS между
+# соседними событиями import приписывается импортируемому модулю.
+PROBE = '''
+import json, os, sys, time
+
+
+def rss():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+events = []
+
+
+def hook(event, args):
+    if event == 'import':
+        events.append((args[0], rss()))
+
+
+start_rss, start = rss(), time.perf_counter()
+sys.addaudithook(hook)
+import django
+django.setup()
+from django.conf import settings
+events.append(('', rss()))
+print(json.dumps({
+    'apps': list(settings.INSTALLED_APPS),
+    'events': events,
+    'total': time.perf_counter() - start,
+    'rss': rss(),
+    'rss_delta': rss() - start_rss,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время импорта и прирост памяти при запуске Django '
+            'по приложениям из INSTALLED_APPS и прочим пакетам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        prefixes = sorted(
+            (app.split('.apps.')[0] for app in report['apps']),
+            key=len, reverse=True,
+        )
+
+        def owner(module):
+            for prefix in prefixes:
+                if module == prefix or module.startswith(prefix + '.'):
+                    return prefix
+            return module.split('.')[0]
+
+        times, memory = defaultdict(int), defaultdict(int)
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and 'self [us]' not in line:
+                own, _, module = line[len('import time:'):].split('|')
+                times[owner(module.strip())] += int(own)
+        events = report['events']
+        for (module, before), (_, after) in zip(events, events[1:]):
+            memory[owner(module)] += after - before
+
+        self.stdout.write(f'Настройки: {env["DJANGO_SETTINGS_MODULE"]}')
+        self.stdout.write(
+            f'Всего: {report["total"] * 1000:.0f} мс, '
+            f'RSS {report["rss"] / 2 ** 20:.1f} МБ '
+            f'(+{report["rss_delta"] / 2 ** 20:.1f} МБ)')
+        self.stdout.write('Приложения:')
+        for app in report['apps']:
+            self._row(app.split('.apps.')[0], times, memory)
+        self.stdout.write('Прочие пакеты:')
+        others = sorted(
+            (name for name in times if name not in prefixes),
+            key=lambda name: -times[name],
+        )
+        for name in others[:options['top']]:
+            self._row(name, times, memory)
+
+    def _row(self, name, times, memory):
+        self.stdout.write(
+            f'  {name:32} {times[name] / 1000:7.1f} мс '
+            f'{memory[name] / 2 ** 20:+6.1f} МБ')
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import make_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Выдаёт токен для заголовка X-Profile: запросы пользователя '
+            'с ним будут профилированы. Срок действия — '
+            'PROFILING_TOKEN_MAX_AGE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден')
+        self.stdout.write(make_token(user))
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def _run(pk):
+    try:
+        return tasks.run_task(pk)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS)
+        parser.add_argument(
+            '--poll', type=float, default=settings.TASKS_POLL_INTERVAL)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        self._requeue_stale()
+        requeue_at = time.monotonic() + settings.TASKS_REQUEUE_INTERVAL
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            running = set()
+            while True:
+                # Воркер другого процесса может упасть в любой момент,
+                # поэтому зависшие задачи ищутся не только при старте.
+                if time.monotonic() >= requeue_at:
+                    self._requeue_stale()
+                    requeue_at = (time.monotonic()
+                                  + settings.TASKS_REQUEUE_INTERVAL)
+                # Задачи забираются по мере освобождения процессов: одна
+                # долгая задача не держит остальные в очереди.
+                free = workers - len(running)
+                claimed = tasks.claim(free) if free else []
+                running.update(pool.submit(_run, pk) for pk in claimed)
+                if running:
+                    done, running = wait(running, timeout=options['poll'],
+                                         return_when=FIRST_COMPLETED)
+                    if done:
+                        self.stdout.write(self._format_stats())
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll'])
+
+    def _requeue_stale(self):
+        requeued = tasks.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь: {requeued}')
+
+    def _format_stats(self):
+        stats = tasks.stats()
+        return (
+            'pending={pending} running={running} failed={failed} '
+            'avg_wait={avg_wait:.3f}s avg_run={avg_run:.3f}s'.format(**stats)
+        )
@@ -0,0 +1,152 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import profiling
+from .follows import Following
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/(?!event-stream)|application/(json|javascript|xml)'
+    r'|image/svg\+xml)')
+
+
+def encoding_weights(header):
+    """{кодировка: q} из Accept-Encoding; без q — 1, кривой q — 0."""
+    weights = {}
+    for part in header.split(','):
+        name, *params = part.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+class FollowingMiddleware:
+    """Добавляет request.following — подписки текущего пользователя."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.following = Following(request.user)
+        return self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """Профилирует выборку запросов или запросы с подписанным заголовком
+    X-Profile и сохраняет профиль в PROFILING_DIR/<имя view>/."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.requested(request):
+            return self.get_response(request)
+        with profiling.Profile() as profile:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        profile.save(match.view_name if match else 'unresolved')
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжимает текстовые ответы brotli (если установлен) или gzip.
+
+    Уровень выбирается по размеру ответа из COMPRESSION_LEVELS: мелкие
+    страницы жмутся сильнее, крупные и потоковые — быстрее. Потоковые
+    ответы сбрасываются после каждого куска, чтобы не задерживать
+    первые байты. Картинки, SSE-потоки и уже сжатые ответы не трогаются.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not COMPRESSIBLE_TYPES.match(content_type):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.negotiate(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_sequence(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = self.compress(
+                response.content, encoding, len(response.content))
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def negotiate(request):
+        """Кодировка с наибольшим q; q=0 запрещает её. При равных q
+        brotli предпочтительнее gzip."""
+        weights = encoding_weights(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        default = weights.get('*', 0)
+        encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        best = max(encodings, key=lambda name: weights.get(name, default))
+        if weights.get(best, default) <= 0:
+            return None
+        return best
+
+    @staticmethod
+    def level(encoding, size=None):
+        for limit, gzip_level, brotli_level in settings.COMPRESSION_LEVELS:
+            if limit is None or (size is not None and size <= limit):
+                return brotli_level if encoding == 'br' else gzip_level
+
+    def compressor(self, encoding, size=None):
+        if encoding == 'br':
+            return brotli.Compressor(quality=self.level(encoding, size))
+        # wbits=31 — заголовок и контрольная сумма gzip.
+        return zlib.compressobj(self.level(encoding, size), zlib.DEFLATED, 31)
+
+    def compress(self, data, encoding, size):
+        compressor = self.compressor(encoding, size)
+        if encoding == 'br':
+            return compressor.process(data) + compressor.finish()
+        return compressor.compress(data) + compressor.flush()
+
+    def compress_sequence(self, sequence, encoding):
+        compressor = self.compressor(encoding)
+        for item in sequence:
+            if encoding == 'br':
+                chunk = compressor.process(item) + compressor.flush()
+            else:
+                chunk = (compressor.compress(item)
+                         + compressor.flush(zlib.Z_SYNC_FLUSH))
+            if chunk:
+                yield chunk
+        yield compressor.finish() if encoding == 'br' else compressor.flush()
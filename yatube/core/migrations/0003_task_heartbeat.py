@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_started(apps, schema_editor):
+    # Иначе выполнявшиеся при обновлении задачи никогда не вернулись бы
+    # в очередь.
+    Task = apps.get_model('core', 'Task')
+    Task.objects.filter(status='running').update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний признак жизни'),
+        ),
+        migrations.RunPython(copy_started, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,111 @@
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare
+
+SALT = 'core.profiling'
+
+
+def make_token(user):
+    return signing.dumps({'user': str(user.pk)}, salt=SALT)
+
+
+def token_valid(token, user):
+    """Токен подписан, не старше PROFILING_TOKEN_MAX_AGE и выдан
+    тому же пользователю: перехваченный заголовок чужому не подойдёт."""
+    if not user.is_authenticated:
+        return False
+    try:
+        data = signing.loads(token, salt=SALT,
+                             max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return (isinstance(data, dict)
+            and constant_time_compare(str(data.get('user')), str(user.pk)))
+
+
+def requested(request):
+    """Профилировать ли запрос: по доле PROFILING_SAMPLE_RATE или по
+    подписанному заголовку X-Profile."""
+    token = request.META.get('HTTP_X_PROFILE')
+    if token and token_valid(token, request.user):
+        return True
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def frame_name(frame):
+    return f'{frame.f_globals.get("__name__", "?")}:{frame.f_code.co_name}'
+
+
+class Sampler(threading.Thread):
+    """Раз в interval секунд снимает стек потока thread_id (до кадра
+    root) и считает одинаковые стеки — формат folded для flamegraph."""
+
+    def __init__(self, thread_id, root, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+
+class Profile:
+    """Профиль блока кода: cProfile (.prof) или выборочный (.folded),
+    в зависимости от PROFILING_MODE."""
+
+    def __init__(self, mode=None):
+        self.mode = mode or settings.PROFILING_MODE
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler = Sampler(threading.get_ident(), sys._getframe(1),
+                                    settings.PROFILING_INTERVAL)
+            self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def save(self, name):
+        directory = os.path.join(settings.PROFILING_DIR,
+                                 name.replace(':', '.'))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{time.time():.6f}-{os.getpid()}')
+        if self.mode == 'cprofile':
+            path += '.prof'
+            self.profiler.dump_stats(path)
+        else:
+            path += '.folded'
+            with open(path, 'w') as file:
+                for stack, count in self.profiler.stacks.items():
+                    file.write(f'{stack} {count}\n')
+        return path
@@ -0,0 +1,96 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .views import too_many_requests
+
+
+def limit_key(scope, kind, ident, window):
+    return f'ratelimit:{scope}:{kind}:{ident}:{window}'
+
+
+def hit(scope, kind, ident, limit, period, now=None):
+    """Учитывает запрос и возвращает None или число секунд до следующей
+    разрешённой попытки.
+
+    Скользящее окно из двух счётчиков: запросы прошлого окна учитываются
+    с весом, убывающим по мере его ухода, поэтому ограничение плавное,
+    как у token bucket, без всплеска на границе окон. Счётчики меняются
+    только через add и incr кеша RATELIMIT_CACHE: гонок между воркерами
+    нет, если он общий и incr в нём атомарен (Memcached, Redis). В LocMem
+    у каждого процесса свои счётчики, а incr FileBasedCache — это get и
+    set.
+    """
+    cache = caches[settings.RATELIMIT_CACHE]
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    key = limit_key(scope, kind, ident, int(window))
+    cache.add(key, 0, period * 2)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен между add и incr.
+        count = 1
+        cache.set(key, count, period * 2)
+    previous = cache.get(limit_key(scope, kind, ident, int(window) - 1), 0)
+    weight = 1 - elapsed / period
+    if previous * weight + count <= limit:
+        return None
+    if count < limit:
+        # Ждём, пока вес прошлого окна не освободит место для запроса.
+        wait = period * (1 - (limit - count - 1) / previous) - elapsed
+    else:
+        # В этом окне места нет; в следующем текущий счётчик станет
+        # прошлым и тоже должен «остыть».
+        wait = period - elapsed + period * (1 - (limit - 1) / count)
+    return max(1, math.ceil(round(wait, 6)))
+
+
+def client_ip(request):
+    """IP клиента. За RATELIMIT_PROXY_COUNT доверенными прокси берётся из
+    X-Forwarded-For: каждый прокси дописывает адрес справа, поэтому
+    левее нужного адреса всё могло прийти от самого клиента."""
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        if len(addresses) >= proxies:
+            return addresses[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, scope):
+    limits = settings.RATELIMITS.get(scope, {})
+    idents = {'ip': client_ip(request)}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    retry_after = None
+    for kind, (limit, period) in limits.items():
+        if kind not in idents:
+            continue
+        wait = hit(scope, kind, idents[kind], limit, period)
+        if wait is not None:
+            retry_after = max(wait, retry_after or 0)
+    return retry_after
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к view по пользователю и по IP.
+    Лимиты берутся из RATELIMITS[scope]; при превышении — ответ 429
+    с заголовком Retry-After."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLED and (
+                    methods is None or request.method in methods):
+                retry_after = check(request, scope)
+                if retry_after is not None:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+
+    return decorator
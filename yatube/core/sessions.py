@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+
+SIGNED_COOKIE_SALT = 'django.contrib.sessions.backends.signed_cookies'
+
+
+class SessionStore(cached_db.SessionStore):
+    """Сессия анонимного читателя хранится в подписанной куке и не
+    обращается ни к кешу, ни к БД. После входа сессия переезжает в кеш с
+    записью в БД (как в cached_db)."""
+
+    @staticmethod
+    def is_signed(session_key):
+        return bool(session_key) and ':' in session_key
+
+    def load(self):
+        if not self.is_signed(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=settings.SESSION_COOKIE_AGE,
+                salt=SIGNED_COOKIE_SALT,
+            )
+        except Exception:
+            self._session_key = None
+            return {}
+
+    def exists(self, session_key):
+        if self.is_signed(session_key):
+            return False
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if SESSION_KEY in self._session:
+            if self.is_signed(self.session_key):
+                self._session_key = None
+            return super().save(must_create)
+        self._session_key = signing.dumps(
+            self._session,
+            compress=True,
+            salt=SIGNED_COOKIE_SALT,
+            serializer=self.serializer,
+        )
+
+    def delete(self, session_key=None):
+        key = self.session_key if session_key is None else session_key
+        if not self.is_signed(key):
+            return super().delete(session_key)
+        if session_key is None:
+            self._session_key = None
+            self._session_cache = {}
@@ -0,0 +1,151 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFilesApp:
+    """WSGI-обёртка, отдающая STATIC_URL и MEDIA_URL с диска мимо Django.
+
+    Хешированные статические файлы кешируются навсегда, сжатые копии .br
+    и .gz отдаются по Accept-Encoding, поддерживаются условные запросы и
+    Range. Целые файлы передаются через wsgi.file_wrapper, что позволяет
+    серверу (gunicorn, uWSGI) использовать sendfile.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.roots = [
+            (settings.STATIC_URL, settings.STATIC_ROOT, True),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, False),
+        ]
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            path = environ.get('PATH_INFO', '')
+            for url, root, static in self.roots:
+                if root and path.startswith(url):
+                    filename = self.find(root, path[len(url):])
+                    if filename:
+                        return self.serve(environ, start_response,
+                                          filename, static)
+        return self.application(environ, start_response)
+
+    @staticmethod
+    def find(root, name):
+        root = os.path.abspath(root)
+        filename = os.path.abspath(os.path.join(root, name))
+        if filename.startswith(root + os.sep) and os.path.isfile(filename):
+            return filename
+        return None
+
+    def serve(self, environ, start_response, filename, static):
+        content_type = mimetypes.guess_type(filename)[0]
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Accept-Ranges', 'bytes'),
+            ('Vary', 'Accept-Encoding'),
+            ('Cache-Control', self.cache_control(filename, static)),
+        ]
+        requested = environ.get('HTTP_RANGE')
+        encoding = None
+        if not requested:
+            filename, encoding = self.negotiate(environ, filename)
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        stat = os.stat(filename)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+
+        start, end = 0, stat.st_size - 1
+        status = '200 OK'
+        if requested:
+            byte_range = self.parse_range(requested, stat.st_size)
+            if byte_range is None:
+                headers.append(('Content-Range', f'bytes */{stat.st_size}'))
+                start_response('416 Range Not Satisfiable', headers)
+                return []
+            start, end = byte_range
+            status = '206 Partial Content'
+            headers.append(
+                ('Content-Range', f'bytes {start}-{end}/{stat.st_size}'))
+        length = end - start + 1
+        headers.append(('Content-Length', str(length)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(filename, 'rb')
+        if length == stat.st_size:
+            wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+            return wrapper(file, CHUNK_SIZE)
+        return self.read_range(file, start, length)
+
+    @staticmethod
+    def cache_control(filename, static):
+        if static and HASHED_NAME.search(filename):
+            return 'public, max-age=31536000, immutable'
+        if static:
+            return f'public, max-age={settings.STATIC_MAX_AGE}'
+        return f'public, max-age={settings.MEDIA_MAX_AGE}'
+
+    @staticmethod
+    def negotiate(environ, filename):
+        accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(filename + suffix):
+                return filename + suffix, encoding
+        return filename, None
+
+    @staticmethod
+    def not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            return etag in if_none_match or if_none_match.strip() == '*'
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    @staticmethod
+    def parse_range(header, size):
+        match = RANGE.match(header.strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        if start > end or start >= size:
+            return None
+        return start, end
+
+    @staticmethod
+    def read_range(file, start, length):
+        with file:
+            file.seek(start)
+            while length > 0:
+                chunk = file.read(min(CHUNK_SIZE, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
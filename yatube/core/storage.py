@@ -0,0 +1,40 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml',
+                '.ico', '.map')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами в именах файлов плюс сжатые копии .gz и .br
+    (если установлен brotli) рядом с текстовыми файлами."""
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if (not dry_run and hashed_name
+                    and hashed_name.endswith(COMPRESSIBLE)):
+                self.compress(self.path(hashed_name))
+            yield name, hashed_name, processed
+
+    @staticmethod
+    def compress(path):
+        with open(path, 'rb') as source:
+            data = source.read()
+        variants = [('.gz', gzip.compress(data, compresslevel=9))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
@@ -0,0 +1,149 @@
+import json
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_current = None
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с именем name."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, *args, key=None):
+    """Ставит задачу в очередь после коммита текущей транзакции.
+
+    Пока задача с ключом key ждёт или выполняется, такая же не создаётся;
+    завершённая задача ключ освобождает.
+    """
+    if name not in _registry:
+        raise KeyError(f'Неизвестная задача {name}')
+
+    def _create():
+        if settings.TASKS_EAGER:
+            _registry[name](*args)
+            return
+        try:
+            with transaction.atomic():
+                Task.objects.create(name=name, args=json.dumps(args), key=key)
+        except IntegrityError:
+            logger.debug('Задача с ключом %s уже в очереди', key)
+
+    transaction.on_commit(_create)
+
+
+def claim(limit):
+    """Забирает до limit готовых к запуску задач и возвращает их id."""
+    now = timezone.now()
+    pks = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now,
+    ).values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in pks:
+        updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, started=now, heartbeat=now)
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, зависшие после падения воркера: те,
+    что не отмечались живыми дольше TASKS_STALE_AFTER. Долгая задача,
+    которая ещё выполняется, сюда не попадает."""
+    deadline = timezone.now() - timedelta(seconds=settings.TASKS_STALE_AFTER)
+    return Task.objects.filter(
+        status=Task.RUNNING, heartbeat__lt=deadline,
+    ).update(status=Task.PENDING)
+
+
+class Heartbeat(threading.Thread):
+    """Пока задача pk выполняется, раз в TASKS_HEARTBEAT секунд обновляет
+    её heartbeat."""
+
+    def __init__(self, pk):
+        super().__init__(daemon=True)
+        self.pk = pk
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            while not self.done.wait(settings.TASKS_HEARTBEAT):
+                Task.objects.filter(pk=self.pk, status=Task.RUNNING).update(
+                    heartbeat=timezone.now())
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+
+def report_progress(done, total):
+    """Сохраняет прогресс выполняемой задачи в процентах."""
+    if _current is not None and total:
+        Task.objects.filter(pk=_current).update(
+            progress=min(100, done * 100 // total))
+
+
+def run_task(pk):
+    """Выполняет задачу; при ошибке откладывает повтор или помечает
+    задачу упавшей после TASKS_MAX_ATTEMPTS попыток."""
+    global _current
+    item = Task.objects.get(pk=pk)
+    item.attempts += 1
+    _current = pk
+    heartbeat = Heartbeat(pk)
+    heartbeat.start()
+    try:
+        _registry[item.name](*json.loads(item.args))
+    except Exception:
+        item.error = traceback.format_exc()
+        if item.attempts < settings.TASKS_MAX_ATTEMPTS:
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (item.attempts - 1)
+            item.status = Task.PENDING
+            item.run_at = timezone.now() + timedelta(seconds=delay)
+        else:
+            item.status = Task.FAILED
+            item.finished = timezone.now()
+            item.key = None
+        logger.warning('Задача %s упала (попытка %s)', item, item.attempts)
+    else:
+        item.status = Task.DONE
+        item.finished = timezone.now()
+        item.progress = 100
+        item.error = ''
+        item.key = None
+    finally:
+        _current = None
+        heartbeat.stop()
+    item.save()
+    return item.status
+
+
+def stats(sample=100):
+    """Глубина очереди по статусам и задержки последних задач в секундах."""
+    result = {status: 0 for status, _ in Task.STATUS_CHOICES}
+    for status in result:
+        result[status] = Task.objects.filter(status=status).count()
+    recent = Task.objects.filter(status=Task.DONE).order_by('-finished')
+    recent = recent.values_list('created', 'started', 'finished')[:sample]
+    waits = [(s - c).total_seconds() for c, s, _ in recent]
+    runs = [(f - s).total_seconds() for _, s, f in recent]
+    result['avg_wait'] = sum(waits) / len(waits) if waits else 0.0
+    result['avg_run'] = sum(runs) / len(runs) if runs else 0.0
+    return result
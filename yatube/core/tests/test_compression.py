@@ -0,0 +1,70 @@
+import gzip
+from unittest import skipUnless
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from ..middleware import CompressionMiddleware, brotli
+
+HTML = '<p>Тестовый пост</p>\n'.encode() * 500
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def process(self, response, encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request)
+
+    def test_gzip(self):
+        """HTML сжимается gzip, Vary выставлен."""
+        response = self.process(HttpResponse(HTML), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), HTML)
+
+    @skipUnless(brotli, 'brotli не установлен')
+    def test_brotli(self):
+        """При наличии brotli он предпочтительнее gzip."""
+        response = self.process(HttpResponse(HTML))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), HTML)
+
+    def test_skipped_responses(self):
+        """Картинки, мелкие ответы и клиенты без gzip не сжимаются."""
+        cases = (
+            (HttpResponse(HTML, content_type='image/jpeg'), 'gzip'),
+            (HttpResponse(b'<p>short</p>'), 'gzip'),
+            (HttpResponse(HTML), 'identity'),
+            (HttpResponse(HTML), 'gzip;q=0, br;q=0'),
+            (StreamingHttpResponse(iter([HTML]),
+                                   content_type='text/event-stream'),
+             'gzip'),
+        )
+        for response, encoding in cases:
+            with self.subTest(content_type=response['Content-Type']):
+                response = self.process(response, encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_q_values(self):
+        """Кодировка выбирается по q, q=0 её запрещает."""
+        cases = {
+            'br;q=0, gzip': 'gzip',
+            'gzip;q=0.5, *;q=0.1': 'gzip',
+            '*': 'br' if brotli else 'gzip',
+            'gzip;q=0, *': 'br' if brotli else None,
+            'deflate': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                request = RequestFactory().get(
+                    '/', HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(CompressionMiddleware.negotiate(request),
+                                 expected)
+
+    def test_streaming_flushes_every_chunk(self):
+        """Каждый кусок потока уходит сразу, а не копится в буфере."""
+        response = self.process(
+            StreamingHttpResponse(iter([HTML, HTML])), 'gzip')
+        chunks = list(response.streaming_content)
+        self.assertGreaterEqual(len(chunks), 3)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), HTML * 2)
@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.db.utils import load_backend
+from django.test import SimpleTestCase
+
+from ..db.pool import Pool, PoolTimeout
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+
+    def cursor(self):
+        if self.broken:
+            raise OSError('server closed the connection')
+        return self
+
+    def execute(self, sql):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class PoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        options = dict({'MIN_SIZE': 0, 'MAX_SIZE': 2, 'TIMEOUT': 0.05},
+                       **options)
+        return Pool(options)
+
+    def test_reuse_and_limit(self):
+        """Возвращённое соединение выдаётся снова, сверх MAX_SIZE — ожидание
+        и PoolTimeout."""
+        pool = self.make_pool()
+        first = pool.checkout(FakeConnection)
+        second = pool.checkout(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(FakeConnection)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(FakeConnection), first)
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['saturation'], 1)
+        self.assertFalse(second.closed)
+
+    def test_waiting_checkout(self):
+        """Поток ждёт, пока другой не вернёт соединение."""
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=5)
+        held = pool.checkout(FakeConnection)
+        timer = threading.Timer(0.05, pool.checkin, [held])
+        timer.start()
+        self.assertIs(pool.checkout(FakeConnection), held)
+        timer.join()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['max_wait'], 0)
+
+    def test_health_check(self):
+        """Давно простаивавшее соединение проверяется и при сбое
+        заменяется новым."""
+        pool = self.make_pool(CHECK_AFTER=0)
+        broken = pool.checkout(FakeConnection)
+        pool.checkin(broken)
+        broken.broken = True
+        fresh = pool.checkout(FakeConnection)
+        self.assertIsNot(fresh, broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.stats()['failed_checks'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_unusable_and_idle_connections_closed(self):
+        """Непригодные и лишние простаивающие соединения закрываются."""
+        pool = self.make_pool(MIN_SIZE=1, MAX_IDLE=0)
+        first = pool.checkout(FakeConnection)
+        second = pool.checkout(FakeConnection)
+        pool.checkin(first, reusable=False)
+        self.assertTrue(first.closed)
+        pool.checkin(second)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_fill_and_fork(self):
+        """Пул заполняется до MIN_SIZE; после fork соединения родителя
+        забываются."""
+        pool = self.make_pool(MIN_SIZE=2)
+        pool.fill(FakeConnection)
+        self.assertEqual(pool.stats()['idle'], 2)
+        pool.pid = -1
+        pool.checkout(FakeConnection)
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['created'], 1)
+
+
+class PooledBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        backend = load_backend('core.db.backends.sqlite3')
+        self.wrapper = backend.DatabaseWrapper(dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory, 'pool.sqlite3'),
+            POOL={'MIN_SIZE': 1, 'MAX_SIZE': 2},
+        ), alias='pooled')
+        self.addCleanup(lambda: self.wrapper.pool.close_all())
+
+    def query(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = self.wrapper.connection
+        self.wrapper.close()
+        return raw
+
+    def test_connection_reused_between_requests(self):
+        """Закрытие возвращает соединение в пул, следующий запрос берёт
+        его же."""
+        raw = self.query()
+        self.assertIsNone(self.wrapper.connection)
+        self.assertIs(self.query(), raw)
+        self.assertEqual(self.wrapper.pool.stats()['created'], 1)
+
+    def test_connection_after_error_discarded(self):
+        """Соединение после ошибки базы в пул не возвращается."""
+        raw = self.query()
+        self.wrapper.ensure_connection()
+        self.wrapper.errors_occurred = True
+        self.wrapper.close()
+        self.assertEqual(self.wrapper.pool.stats()['discarded'], 1)
+        self.assertIsNot(self.query(), raw)
+
+
+@skipUnless(psycopg2, 'psycopg2 не установлен')
+class PooledPostgresqlTests(SimpleTestCase):
+    def setUp(self):
+        backend = load_backend('core.db.backends.postgresql')
+        self.wrapper = backend.DatabaseWrapper(dict(
+            connection.settings_dict,
+            ENGINE='core.db.backends.postgresql',
+            NAME='yatube', USER='', PASSWORD='', HOST='', PORT='',
+            OPTIONS={}, POOL={'MIN_SIZE': 1, 'MAX_SIZE': 2},
+        ), alias='pooled_postgresql')
+        connect = mock.patch('psycopg2.connect',
+                             side_effect=lambda **params: mock.MagicMock())
+        self.connect = connect.start()
+        self.addCleanup(connect.stop)
+        self.addCleanup(lambda: self.wrapper.pool.close_all())
+
+    def checkout(self):
+        self.wrapper.ensure_connection()
+        return self.wrapper.connection
+
+    def test_connection_returned_to_pool(self):
+        """Закрытие обёртки возвращает соединение psycopg2 в пул."""
+        raw = self.checkout()
+        self.wrapper.close()
+        raw.close.assert_not_called()
+        self.assertIs(self.checkout(), raw)
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_transaction_rolled_back_on_checkin(self):
+        """Соединение без autocommit возвращается после отката."""
+        raw = self.checkout()
+        self.wrapper.set_autocommit(False)
+        self.wrapper.close()
+        raw.rollback.assert_called_once_with()
+        self.assertEqual(self.wrapper.pool.stats()['idle'], 1)
+
+    def test_broken_connection_discarded(self):
+        """Соединение после ошибки базы закрывается, а не возвращается."""
+        raw = self.checkout()
+        self.wrapper.errors_occurred = True
+        self.wrapper.close()
+        raw.close.assert_called_once_with()
+        self.assertEqual(self.wrapper.pool.stats()['idle'], 0)
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+from .. import follow_graph
+from ..follow_graph import FollowGraph, get_graph, publish
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_GRAPH=True, FOLLOW_GRAPH_POLL_INTERVAL=0)
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(3)]
+        for author in reversed(cls.authors):
+            Follow.objects.create(user=cls.reader, author=author)
+        Follow.objects.create(user=cls.authors[1], author=cls.authors[0])
+        Post.objects.create(author=cls.authors[0], text='text')
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.addCleanup(follow_graph.reset)
+
+    def test_load(self):
+        """Граф строится одним запросом, массивы отсортированы и без
+        повторов."""
+        with self.assertNumQueries(1):
+            graph = FollowGraph.load()
+        ids = [author.pk for author in self.authors]
+        self.assertEqual(list(graph.following(self.reader.pk)), ids)
+        self.assertEqual(list(graph.followers(ids[0])),
+                         sorted([self.reader.pk, ids[1]]))
+        self.assertTrue(graph.follows(self.reader.pk, ids[2]))
+        self.assertFalse(graph.follows(ids[2], self.reader.pk))
+        self.assertEqual(list(graph.following(ids[2])), [])
+        self.assertEqual(graph.edges, 4)
+        self.assertGreater(graph.stats()['bytes'], 0)
+
+    def test_refresh_applies_journal(self):
+        """Изменения других процессов приходят через журнал в кеше."""
+        graph = get_graph()
+        publish(('add', self.authors[2].pk, self.reader.pk))
+        publish(('remove', self.reader.pk, self.authors[1].pk))
+        with self.assertNumQueries(0):
+            self.assertIs(get_graph(), graph)
+        self.assertTrue(graph.follows(self.authors[2].pk, self.reader.pk))
+        self.assertFalse(graph.follows(self.reader.pk, self.authors[1].pk))
+        self.assertEqual(graph.version, 2)
+
+    def test_lost_journal_reloads(self):
+        """Пропавшее событие или команда перестройки перечитывают базу."""
+        graph = get_graph()
+        publish(('add', self.authors[2].pk, self.reader.pk))
+        cache.delete(follow_graph.event_key(1))
+        self.assertIs(get_graph(), graph)
+        self.assertIsNot(get_graph(), graph)
+        graph = get_graph()
+        follow_graph.reload_all()
+        self.assertIsNot(get_graph(), graph)
+
+    def test_views_skip_follow_table(self):
+        """Профиль и лента подписок не обращаются к posts_follow."""
+        client = Client()
+        client.force_login(self.reader)
+        get_graph()
+        urls = [
+            reverse('posts:profile', args=[self.authors[0].username]),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'text')
+                for query in queries:
+                    self.assertNotIn('posts_follow', query['sql'])
+
+
+@override_settings(FOLLOW_GRAPH=True, FOLLOW_GRAPH_POLL_INTERVAL=0)
+class FollowGraphSignalTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.addCleanup(follow_graph.reset)
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+
+    def test_signals_update_graph(self):
+        """Подписка и отписка меняют граф процесса после коммита."""
+        graph = get_graph()
+        follow = Follow.objects.create(user=self.author, author=self.reader)
+        self.assertTrue(graph.follows(self.author.pk, self.reader.pk))
+        self.assertEqual(list(graph.followers(self.reader.pk)),
+                         [self.author.pk])
+        follow.delete()
+        self.assertFalse(graph.follows(self.author.pk, self.reader.pk))
+        self.assertIs(get_graph(), graph)
+
+    def test_rolled_back_follow_not_published(self):
+        """Откаченная подписка не попадает ни в граф, ни в журнал."""
+        graph = get_graph()
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=self.author, author=self.reader)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(graph.follows(self.author.pk, self.reader.pk))
+        self.assertEqual(follow_graph.current_version(), 0)
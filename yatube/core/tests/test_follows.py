@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+from ..follows import Following, following_key
+
+User = get_user_model()
+
+
+class FollowingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(3)]
+        cls.group = Group.objects.create(title='group', slug='group',
+                                         description='group')
+        for author in cls.authors:
+            Post.objects.create(author=author, text='text', group=cls.group)
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ids_cached_between_requests(self):
+        """Подписки грузятся одним запросом и берутся из кеша."""
+        with self.assertNumQueries(1):
+            following = Following(self.user)
+            self.assertTrue(following.is_following(self.authors[0]))
+            self.assertNotIn(self.authors[1], following)
+        with self.assertNumQueries(0):
+            self.assertIn(self.authors[0].pk, Following(self.user))
+
+    def test_follow_change_invalidates_cache(self):
+        """Подписка и отписка сбрасывают кеш."""
+        self.assertNotIn(self.authors[1], Following(self.user))
+        follow = Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertIn(self.authors[1], Following(self.user))
+        follow.delete()
+        self.assertNotIn(self.authors[1], Following(self.user))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'following-tests'},
+    }, FOLLOWING_CACHE='shared')
+    def test_following_cache_alias(self):
+        """Подписки лежат в кеше FOLLOWING_CACHE и сбрасываются в нём."""
+        caches['shared'].clear()
+        self.assertNotIn(self.authors[1], Following(self.user))
+        with self.assertNumQueries(0):
+            self.assertNotIn(self.authors[1], Following(self.user))
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertIn(self.authors[1], Following(self.user))
+
+    def test_follow_is_unique(self):
+        """Повторная подписка при устаревшем кеше не создаёт дубль."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:profile_follow',
+                      args=[self.authors[0].username])
+        cache.set(following_key(self.user.pk), frozenset())
+        client.get(url)
+        self.assertEqual(Follow.objects.filter(
+            user=self.user, author=self.authors[0]).count(), 1)
+
+    def test_feed_follow_buttons_without_extra_queries(self):
+        """Кнопки подписки в ленте группы не добавляют запросов."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:group_list', args=[self.group.slug])
+        client.get(url)
+        with self.assertNumQueries(2):
+            response = client.get(url)
+        self.assertContains(response, 'отписаться от автора', count=1)
+        self.assertContains(response, 'подписаться на автора', count=2)
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from ..profiling import make_token
+
+PROFILING_DIR = tempfile.mkdtemp()
+INDEX_DIR = os.path.join(PROFILING_DIR, 'posts.main')
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR, PROFILING_SAMPLE_RATE=0)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='profiler')
+        cls.other = User.objects.create_user(username='other')
+
+    def client_for(self, user, token):
+        client = Client(HTTP_X_PROFILE=token)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def tearDown(self):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+
+    def test_disabled_by_default(self):
+        """Без заголовка и с неверным токеном профиль не пишется."""
+        Client().get('/')
+        Client(HTTP_X_PROFILE='forged').get('/')
+        self.assertFalse(os.path.exists(INDEX_DIR))
+
+    def test_signed_header(self):
+        """Запрос с подписанным заголовком профилируется по стекам."""
+        self.client_for(self.user, make_token(self.user)).get('/')
+        files = os.listdir(INDEX_DIR)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('.folded'))
+
+    def test_token_bound_to_user(self):
+        """Токен не действует для анонима и другого пользователя."""
+        token = make_token(self.user)
+        self.client_for(None, token).get('/')
+        self.client_for(self.other, token).get('/')
+        self.assertFalse(os.path.exists(INDEX_DIR))
+
+    @override_settings(PROFILING_TOKEN_MAX_AGE=-1)
+    def test_expired_token(self):
+        """Просроченный токен не включает профилирование."""
+        self.client_for(self.user, make_token(self.user)).get('/')
+        self.assertFalse(os.path.exists(INDEX_DIR))
+
+    def test_token_command(self):
+        """Команда выдаёт токен для указанного пользователя."""
+        stdout = StringIO()
+        call_command('profile_token', self.user.username, stdout=stdout)
+        self.client_for(self.user, stdout.getvalue().strip()).get('/')
+        self.assertTrue(os.path.exists(INDEX_DIR))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MODE='cprofile')
+    def test_sampled_cprofile_and_aggregate(self):
+        """Выборка запросов пишет .prof, команда сводит их по view."""
+        for _ in range(2):
+            Client().get('/')
+        self.assertEqual(len(os.listdir(INDEX_DIR)), 2)
+        output = os.path.join(PROFILING_DIR, 'summary')
+        stdout = StringIO()
+        call_command('aggregate_profiles', 'posts.main', output=output,
+                     stdout=stdout)
+        self.assertIn('posts.main: 0 выборочных, 2 cProfile',
+                      stdout.getvalue())
+        self.assertIn('(index)', stdout.getvalue())
+        self.assertTrue(
+            os.path.exists(os.path.join(output, 'posts.main.prof')))
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+from ..ratelimit import hit, limit_key
+
+User = get_user_model()
+
+LIMITS = {
+    'add_comment': {'user': (2, 60), 'ip': (3, 60)},
+    'post_create': {'user': (1, 60)},
+}
+
+
+class HitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_window_limit(self):
+        """Сверх лимита возвращается время ожидания."""
+        for _ in range(3):
+            self.assertIsNone(hit('scope', 'user', 1, 3, 60, now=600))
+        self.assertEqual(hit('scope', 'user', 1, 3, 60, now=630), 60)
+        self.assertIsNone(hit('scope', 'user', 2, 3, 60, now=630))
+
+    def test_previous_window_decays(self):
+        """Запросы прошлого окна учитываются с убывающим весом."""
+        for _ in range(3):
+            hit('scope', 'user', 1, 3, 60, now=600)
+        self.assertEqual(hit('scope', 'user', 1, 3, 60, now=665), 35)
+        self.assertIsNone(hit('scope', 'user', 1, 3, 60, now=700))
+
+    @override_settings(RATELIMIT_CACHE='counters', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'worker'},
+        'counters': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'counters'},
+    })
+    def test_counters_in_ratelimit_cache(self):
+        """Счётчики лежат в кеше RATELIMIT_CACHE, а не в кеше процесса."""
+        hit('scope', 'user', 1, 3, 60, now=600)
+        key = limit_key('scope', 'user', 1, 10)
+        self.assertEqual(caches['counters'].get(key), 1)
+        self.assertIsNone(caches['default'].get(key))
+
+
+@override_settings(RATELIMITS=LIMITS)
+class RateLimitViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [User.objects.create_user(username=f'user{i}')
+                     for i in range(2)]
+        cls.post = Post.objects.create(author=cls.users[0], text='text')
+
+    def setUp(self):
+        cache.clear()
+        self.clients = []
+        for user in self.users:
+            client = Client()
+            client.force_login(user)
+            self.clients.append(client)
+        self.comment_url = reverse('posts:add_comment', args=[self.post.pk])
+
+    def test_user_limit(self):
+        """Третий комментарий за минуту получает 429 с Retry-After."""
+        for _ in range(2):
+            response = self.clients[0].post(self.comment_url,
+                                            {'text': 'comment'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.clients[0].post(self.comment_url, {'text': 'comment'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_ip_limit(self):
+        """Лимит по IP общий для всех пользователей с этого адреса."""
+        codes = [
+            client.post(self.comment_url, {'text': 'comment'}).status_code
+            for client in (self.clients * 2)
+        ]
+        self.assertEqual(codes[-1], HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_only_writes_limited(self):
+        """Форма создания поста открывается без ограничений."""
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(self.clients[0].get(url).status_code,
+                             HTTPStatus.OK)
+        self.clients[0].post(url, {'text': 'new'})
+        response = self.clients[0].post(url, {'text': 'new'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATELIMIT_PROXY_COUNT=1)
+    def test_forwarded_ip(self):
+        """За прокси лимит по IP считается по адресу, который дописал
+        прокси, а не по REMOTE_ADDR и не по подставленному клиентом."""
+        for number, client in enumerate(self.clients * 2):
+            response = client.post(
+                self.comment_url, {'text': 'comment'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.1, 192.168.0.{number}')
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(Comment.objects.count(), 4)
+
+    def test_429_page(self):
+        """Страница 429 называется по-человечески."""
+        for _ in range(3):
+            response = self.clients[0].post(self.comment_url,
+                                            {'text': 'comment'})
+        self.assertContains(response, '<title> Слишком много запросов ',
+                            status_code=HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        """RATELIMIT_ENABLED=False снимает ограничения."""
+        for _ in range(3):
+            response = self.clients[0].post(self.comment_url,
+                                            {'text': 'comment'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..sessions import SessionStore
+
+User = get_user_model()
+
+
+class SessionStoreTests(TestCase):
+    def test_anonymous_session_in_signed_cookie(self):
+        """Анонимная сессия не пишется в БД."""
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.save()
+        self.assertTrue(SessionStore.is_signed(session.session_key))
+        self.assertEqual(SessionStore(session.session_key)['theme'], 'dark')
+        self.assertFalse(Session.objects.exists())
+
+    def test_tampered_cookie_is_reset(self):
+        """Подделанная кука даёт пустую сессию."""
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.save()
+        self.assertNotIn('theme', SessionStore(session.session_key + 'x'))
+
+    def test_authenticated_feed_skips_session_table(self):
+        """После входа лента не читает и не пишет django_session."""
+        cache.clear()
+        user = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(user)
+        self.assertEqual(Session.objects.count(), 1)
+        url = reverse('posts:main')
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'django_session' in query['sql']])
+
+    @override_settings(SESSION_CACHE_ALIAS='shared', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'worker'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'sessions'},
+    })
+    def test_logout_seen_by_other_workers(self):
+        """Выход через другой воркер — со своим экземпляром общего кеша —
+        сразу действует и в этом: сессия не живёт в памяти процесса."""
+        user = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:follow_index')
+        self.assertEqual(client.get(url).status_code, 200)
+        other_worker = SessionStore(client.session.session_key)
+        other_worker._cache = LocMemCache('sessions', {})
+        other_worker.flush()
+        self.assertRedirects(client.get(url),
+                             f'{reverse("users:login")}?next={url}')
@@ -0,0 +1,80 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from ..static import StaticFilesApp
+from ..storage import CompressedManifestStaticFilesStorage
+
+CSS = b'body { color: red; }\n' * 100
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+def fallback(environ, start_response):
+    start_response('200 OK', [])
+    return [b'django']
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, MEDIA_ROOT=STATIC_ROOT)
+class StaticFilesAppTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path = os.path.join(STATIC_ROOT, 'site.0123456789ab.css')
+        with open(cls.path, 'wb') as file:
+            file.write(CSS)
+        CompressedManifestStaticFilesStorage.compress(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def request(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path}
+        environ.update(headers)
+        result = {}
+
+        def start_response(status, response_headers):
+            result['status'] = status
+            result['headers'] = dict(response_headers)
+
+        body = b''.join(StaticFilesApp(fallback)(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_hashed_file_cached_forever(self):
+        """Файл с хешем в имени кешируется навсегда."""
+        status, headers, body = self.request('/static/site.0123456789ab.css')
+        self.assertEqual(status, '200 OK')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(body, CSS)
+
+    def test_precompressed_variant(self):
+        """По Accept-Encoding отдаётся заранее сжатая копия."""
+        status, headers, body = self.request(
+            '/static/site.0123456789ab.css', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_range_and_conditional_requests(self):
+        """Поддерживаются Range и If-None-Match."""
+        status, headers, body = self.request(
+            '/media/site.0123456789ab.css', HTTP_RANGE='bytes=5-9')
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(body, CSS[5:10])
+        status, _, _ = self.request(
+            '/media/site.0123456789ab.css', HTTP_RANGE='bytes=99999-')
+        self.assertEqual(status, '416 Range Not Satisfiable')
+        status, _, body = self.request(
+            '/static/site.0123456789ab.css',
+            HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+
+    def test_other_paths_go_to_django(self):
+        """Прочие и отсутствующие пути обрабатывает Django."""
+        for path in ('/', '/static/missing.css', '/static/../settings.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[2], b'django')
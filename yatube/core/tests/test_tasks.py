@@ -0,0 +1,149 @@
+import time
+from concurrent.futures import Future
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from .. import tasks
+from ..models import Task
+
+CALLS = []
+
+
+@tasks.task('tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task('tests.fail')
+def fail():
+    raise ValueError('fail')
+
+
+@tasks.task('tests.wait_heartbeat')
+def wait_heartbeat():
+    task = Task.objects.get(pk=tasks._current)
+    for _ in range(100):
+        time.sleep(0.01)
+        if Task.objects.get(pk=task.pk).heartbeat != task.heartbeat:
+            CALLS.append('alive')
+            return
+
+
+class InlinePool:
+    """Пул без процессов: задачи выполняются сразу при отправке."""
+
+    def __init__(self, *args, **kwargs):
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+class LongFirstPool(InlinePool):
+    """Первая задача «долгая»: завершается, только когда запущены ещё
+    две."""
+
+    def submit(self, func, *args):
+        if not self.futures:
+            future = Future()
+        else:
+            future = super().submit(func, *args)
+        self.futures.append((future, func, args))
+        if len(self.futures) == 3:
+            first, func, args = self.futures[0]
+            first.set_result(func(*args))
+        return future
+
+
+@override_settings(TASKS_EAGER=False, TASKS_MAX_ATTEMPTS=2,
+                   TASKS_RETRY_DELAY=0)
+class TaskQueueTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача попадает в очередь и выполняется воркером."""
+        tasks.enqueue('tests.record', 1)
+        self.assertEqual(tasks.stats()[Task.PENDING], 1)
+        for pk in tasks.claim(10):
+            self.assertEqual(tasks.run_task(pk), Task.DONE)
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(tasks.stats()[Task.DONE], 1)
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом не ставится в очередь повторно."""
+        tasks.enqueue('tests.record', 1, key='same')
+        tasks.enqueue('tests.record', 2, key='same')
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_key_released_when_done(self):
+        """Ключ завершённой задачи можно использовать снова."""
+        tasks.enqueue('tests.record', 1, key='same')
+        for pk in tasks.claim(10):
+            tasks.run_task(pk)
+        tasks.enqueue('tests.record', 2, key='same')
+        self.assertEqual(Task.objects.filter(status=Task.PENDING).count(), 1)
+
+    @override_settings(TASKS_STALE_AFTER=0, TASKS_REQUEUE_INTERVAL=0)
+    def test_stale_requeued_while_running(self):
+        """Зависшие задачи возвращаются в очередь и без перезапуска
+        воркеров."""
+        def sleep(seconds):
+            if Task.objects.exists():
+                raise KeyboardInterrupt
+            # Задачу забрал воркер, который затем упал.
+            tasks.enqueue('tests.record', 1)
+            tasks.claim(10)
+
+        with mock.patch('core.management.commands.run_workers.'
+                        'ProcessPoolExecutor', InlinePool), \
+                mock.patch('time.sleep', side_effect=sleep), \
+                self.assertRaises(KeyboardInterrupt):
+            call_command('run_workers', workers=1, stdout=StringIO())
+        self.assertEqual(CALLS, [1])
+
+    def test_long_task_does_not_block_queue(self):
+        """Пока одна задача выполняется, свободный процесс берёт
+        следующие."""
+        for value in range(1, 4):
+            tasks.enqueue('tests.record', value)
+        with mock.patch('core.management.commands.run_workers.'
+                        'ProcessPoolExecutor', LongFirstPool):
+            call_command('run_workers', workers=2, once=True, poll=0,
+                         stdout=StringIO())
+        self.assertEqual(CALLS, [2, 3, 1])
+
+    @override_settings(TASKS_HEARTBEAT=0.01)
+    def test_heartbeat(self):
+        """Выполняемая задача обновляет heartbeat и не считается
+        зависшей."""
+        tasks.enqueue('tests.wait_heartbeat')
+        tasks.run_task(tasks.claim(1)[0])
+        self.assertEqual(CALLS, ['alive'])
+
+    def test_retries(self):
+        """Упавшая задача повторяется, затем помечается ошибкой."""
+        tasks.enqueue('tests.fail')
+        pk = tasks.claim(10)[0]
+        self.assertEqual(tasks.run_task(pk), Task.PENDING)
+        pk = tasks.claim(10)[0]
+        self.assertEqual(tasks.run_task(pk), Task.FAILED)
+        self.assertEqual(tasks.claim(10), [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        """В режиме TASKS_EAGER задача выполняется сразу."""
+        tasks.enqueue('tests.record', 3)
+        self.assertEqual(CALLS, [3])
+        self.assertFalse(Task.objects.exists())
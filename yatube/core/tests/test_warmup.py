@@ -0,0 +1,19 @@
+import gc
+
+from django.test import SimpleTestCase
+
+from ..warmup import template_names, warm_up
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_template_names(self):
+        """Прогрев находит шаблоны проекта."""
+        names = set(template_names())
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/header.html', names)
+
+    def test_warm_up(self):
+        """Прогрев проходит без ошибок и без обращения к БД."""
+        self.addCleanup(gc.unfreeze)
+        warm_up()
+        self.assertGreater(gc.get_freeze_count(), 0)
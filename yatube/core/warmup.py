@@ -0,0 +1,62 @@
+import gc
+import logging
+import os
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import get_resolver
+from django.utils import translation
+
+from .follow_graph import get_graph
+
+logger = logging.getLogger(__name__)
+
+
+def template_names():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, name), directory)
+
+
+def warm_up():
+    """Загружает всё, что иначе грузилось бы первым запросом в каждом
+    воркере (включая граф подписок), и замораживает объекты для
+    copy-on-write после форка. С WARM_UP_PAGES ещё и рендерит первые
+    страницы лент: кеш в памяти процесса воркеры получат при форке."""
+    get_resolver().url_patterns
+    get_resolver()._populate()
+    for name in template_names():
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            pass
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('This field is required.')
+    translation.deactivate()
+    if settings.FOLLOW_GRAPH:
+        get_graph()
+    if settings.WARM_UP_PAGES:
+        warm_pages()
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+
+
+def warm_pages():
+    from posts.warming import page_urls, warm_pages
+    try:
+        urls = page_urls(settings.WARM_CACHES_PAGES,
+                         settings.WARM_CACHES_GROUPS,
+                         settings.WARM_CACHES_PROFILES)
+        pages = warm_pages(urls, settings.WARM_CACHES_HOST)
+    except DatabaseError:
+        # Без базы воркер всё равно должен подняться — с холодным кешем.
+        logger.exception('Страницы не прогреты')
+        return
+    failed = [url for url, (status, _) in pages.items() if status != 200]
+    if failed:
+        logger.warning('Страницы не прогреты: %s', ', '.join(failed))
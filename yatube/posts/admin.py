@@ -1,15 +1,141 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.utils.text import Truncator
 
-from .models import Group, Post
+from core.tasks import enqueue
+
+from .models import Group, Post, User
+from .moderation import chunks, protected_authors
+from .utils import CachedCountPaginator
+
+
+class CachedAutocompleteSelect(AutocompleteSelect):
+    """Автокомплит, запоминающий подписи выбранных объектов. Копии виджета
+    в строках списка делят словарь, поэтому группа запрашивается один раз
+    на страницу, а не для каждой строки."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        field = self.choices.field
+        selected = {str(v) for v in value if str(v) not in field.empty_values}
+        missing = selected - self.labels.keys()
+        if missing:
+            queryset = self.choices.queryset.using(self.db)
+            for obj in queryset.filter(pk__in=missing):
+                self.labels[str(obj.pk)] = field.label_from_instance(obj)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for pk in selected & self.labels.keys():
+            options.append(self.create_option(
+                name, pk, self.labels[pk], selected, len(options)))
+        return [(None, options, 0)]
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('bulk_delete', 'bulk_regroup', 'ban_authors')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление грузит в память все посты и их комментарии.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def enqueue_chunks(self, name, post_ids, *args):
+        # Тысячи id в одном JSON раздувают строку задачи, а её сбой
+        # откатывает всю операцию — делим на задачи поменьше.
+        for chunk in chunks(post_ids, settings.MODERATION_TASK_SIZE):
+            enqueue(name, chunk, *args)
+
+    def bulk_delete(self, request, queryset):
+        post_ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_chunks('posts.bulk_delete_posts', post_ids)
+        self.message_user(
+            request, f'Удаление постов ({len(post_ids)}) поставлено в '
+                     f'очередь, прогресс — в разделе фоновых задач.')
+    bulk_delete.short_description = 'Удалить выбранные посты в фоне'
+
+    def bulk_regroup(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid() or form.cleaned_data['group'] is None:
+            self.message_user(
+                request, 'Выберите группу, в которую перенести посты.',
+                messages.ERROR)
+            return
+        group_id = form.cleaned_data['group'].pk
+        post_ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_chunks('posts.bulk_regroup_posts', post_ids, group_id)
+        self.message_user(
+            request, f'Перенос постов ({len(post_ids)}) поставлен в очередь.')
+    bulk_regroup.short_description = 'Перенести выбранные посты в группу'
+
+    def ban_authors(self, request, queryset):
+        authors = User.objects.filter(
+            pk__in=queryset.order_by().values('author_id'))
+        skipped = protected_authors(authors) | authors.filter(
+            pk=request.user.pk)
+        author_ids = list(authors.exclude(
+            pk__in=skipped.values('pk')).values_list('pk', flat=True))
+        if author_ids:
+            enqueue('posts.ban_authors', author_ids)
+            self.message_user(
+                request, f'Блокировка авторов ({len(author_ids)}) и '
+                         f'удаление их постов поставлены в очередь.',
+                messages.WARNING)
+        names = sorted(skipped.values_list('username', flat=True))
+        if names:
+            self.message_user(
+                request, f'Не заблокированы (вы сами или сотрудники): '
+                         f'{", ".join(names)}.', messages.ERROR)
+    ban_authors.short_description = 'Заблокировать авторов и удалить посты'
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.list_editable:
+            kwargs['widget'] = CachedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_list_display(self, request):
+        # В списке выводим обрезанный текст, а не весь пост целиком.
+        return tuple('short_text' if name == 'text' else name
+                     for name in self.list_display)
+
+    def short_text(self, obj):
+        return Truncator(obj.text).chars(settings.ADMIN_TEXT_LENGTH)
+    short_text.short_description = 'Текст'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
@@ -0,0 +1,132 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (ArchivedComment, ArchivedPost, Comment, Notification,
+                     Post)
+from .utils import cached_count
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'updated', 'author', 'group',
+               'image')
+COMMENT_FIELDS = ('id', 'post', 'author', 'text', 'created')
+VERSION_KEY = 'archive_version'
+
+
+def archive_cutoff():
+    return timezone.now() - timedelta(days=settings.POSTS_ARCHIVE_AFTER_DAYS)
+
+
+def copy_rows(queryset, model, fields):
+    """INSERT ... SELECT: строки копируются внутри СУБД, без создания
+    объектов моделей."""
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    sql, params = queryset.order_by().values(*fields).query.sql_with_params()
+    columns = ', '.join(
+        quote(model._meta.get_field(name).column) for name in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) {sql}',
+            params)
+
+
+def archive_posts(before=None, chunk_size=None):
+    """Переносит посты старше before вместе с комментариями в архив.
+    Каждая пачка переносится в своей транзакции, уведомления о
+    перенесённых постах удаляются. Возвращает число перенесённых постов."""
+    before = before or archive_cutoff()
+    chunk_size = chunk_size or settings.POSTS_ARCHIVE_CHUNK_SIZE
+    old = Post.objects.filter(pub_date__lt=before)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            ids = list(old.order_by('pk').values_list('pk', flat=True)
+                       [:chunk_size])
+            if not ids:
+                return moved
+            posts = old.filter(pk__lte=ids[-1])
+            comments = Comment.objects.filter(post__in=posts.values('pk'))
+            copy_rows(posts, ArchivedPost, POST_FIELDS)
+            copy_rows(comments, ArchivedComment, COMMENT_FIELDS)
+            comments.delete()
+            Notification.objects.filter(post__in=posts.values('pk')).delete()
+            posts.delete()
+        moved += len(ids)
+        cache.set(VERSION_KEY, archive_version() + 1,
+                  settings.POSTS_ARCHIVE_CACHE_TIMEOUT)
+
+
+def archive_version():
+    return cache.get_or_set(VERSION_KEY, 0,
+                            settings.POSTS_ARCHIVE_CACHE_TIMEOUT)
+
+
+def archived_count(queryset):
+    """Число архивных постов в выборке. Архив меняется только при
+    переносе, поэтому подсчёт кешируется до следующего переноса. Перенос
+    идёт в другом процессе и с локальным кешем версию не сбросит, так что
+    подсчёт живёт не дольше POSTS_ARCHIVE_CACHE_TIMEOUT."""
+    try:
+        query = str(queryset.query).encode()
+    except EmptyResultSet:
+        return 0
+    key = (f'archive_count:{archive_version()}:'
+           f'{hashlib.md5(query).hexdigest()}')
+    count = cache.get(key)
+    if count is None:
+        count = cached_count(queryset)
+        cache.set(key, count, settings.POSTS_ARCHIVE_CACHE_TIMEOUT)
+    return count
+
+
+class TieredPosts:
+    """Лента из горячей таблицы и архива, склеенных по порядку.
+
+    Все архивные посты старше горячих, поэтому архив читается, только
+    когда срез выходит за конец горячей выборки.
+    """
+    ordered = True
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+
+    @cached_property
+    def hot_count(self):
+        if hasattr(self.hot, 'query'):
+            return cached_count(self.hot)
+        return len(self.hot)
+
+    def count(self):
+        return self.hot_count + archived_count(self.cold)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        posts = list(self.hot[start:stop])
+        if len(posts) == stop - start:
+            return posts
+        # Граница между таблицами берётся только по точному числу горячих
+        # постов: hot_count — оценка и может разойтись с самим срезом.
+        boundary = start + len(posts) if posts or not start else (
+            self.hot.count())
+        return posts + list(self.cold[max(start - boundary, 0):
+                                      stop - boundary])
+
+
+def find_post(post_id):
+    """Пост из горячей таблицы, а если его там нет — из архива."""
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).first()
+    if post is None:
+        post = ArchivedPost.objects.select_related('author', 'group').filter(
+            pk=post_id).first()
+    return post
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+
+class LocalBroker:
+    """Pub/sub в памяти процесса: события видят только слушатели этого же
+    процесса. Хранит последние LIVE_HISTORY событий для Last-Event-ID."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=settings.LIVE_HISTORY)
+        self._last_id = 0
+
+    def publish(self, channels, post_id):
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, frozenset(channels), post_id))
+            self._condition.notify_all()
+
+    def head(self):
+        """id последнего события: с него начинает новый слушатель."""
+        with self._condition:
+            return self._last_id
+
+    def listen(self, channels, last_id, timeout):
+        """Возвращает события после last_id, ожидая их не дольше timeout."""
+        channels = set(channels)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            # id из другого процесса или до перезапуска: начинаем с текущего
+            last_id = min(last_id, self._last_id)
+            while True:
+                events = [
+                    (event_id, post_id)
+                    for event_id, event_channels, post_id in self._events
+                    if event_id > last_id and channels & event_channels
+                ]
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                seen = self._last_id
+                self._condition.wait_for(
+                    lambda: self._last_id > seen, timeout=remaining)
+
+
+class DatabaseBroker:
+    """Межпроцессный брокер: опрашивает таблицу постов, id события равен
+    id поста, поэтому publish ничего не делает."""
+
+    def publish(self, channels, post_id):
+        pass
+
+    def head(self):
+        return Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+
+    def listen(self, channels, last_id, timeout):
+        deadline = time.monotonic() + timeout
+        queryset = self._filter(channels)
+        while True:
+            events = list(
+                queryset.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', 'pk')[:settings.LIVE_HISTORY]
+            )
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            # Между опросами соединение не занимает место в пуле.
+            connections[queryset.db].close()
+            time.sleep(min(settings.LIVE_POLL_INTERVAL, remaining))
+
+    def _filter(self, channels):
+        groups, authors = [], []
+        for channel in channels:
+            if channel == 'index':
+                return Post.objects.all()
+            kind, _, value = channel.partition(':')
+            if kind == 'group':
+                groups.append(value)
+            elif kind == 'author':
+                authors.append(int(value))
+        return (Post.objects.filter(group__slug__in=groups)
+                | Post.objects.filter(author_id__in=authors))
+
+
+def post_channels(post):
+    channels = ['index', f'author:{post.author_id}']
+    if post.group_id:
+        channels.append(f'group:{post.group.slug}')
+    return channels
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.LIVE_BROKER)()
+    return _broker
@@ -0,0 +1,268 @@
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.tasks import enqueue
+
+from . import ranking
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+
+def _lock(file):
+    """Берёт эксклюзивную блокировку без ожидания. Журнал живого процесса
+    заблокирован им самим, поэтому чужой журнал, который удалось
+    заблокировать, остался от упавшего процесса."""
+    try:
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def read_journal(journal):
+    entries = []
+    for line in journal:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # Последняя строка могла не дописаться до падения.
+            break
+    return entries
+
+
+def keep_created(comments, created):
+    """Возвращает комментариям время из журнала: auto_now_add в
+    bulk_create ставит время записи пачки. Один UPDATE на пачку."""
+    size = settings.COMMENT_BUFFER_BATCH_SIZE
+    for start in range(0, len(comments), size):
+        chunk = list(zip(comments[start:start + size],
+                         created[start:start + size]))
+        Comment.objects.filter(
+            pk__in=[comment.pk for comment, _ in chunk],
+        ).update(created=Case(
+            *[When(pk=comment.pk, then=Value(moment))
+              for comment, moment in chunk],
+            output_field=DateTimeField(),
+        ))
+        for comment, moment in chunk:
+            comment.created = moment
+
+
+def save_comments(entries, replay=False):
+    """Вставляет комментарии одной транзакцией и выполняет побочные
+    действия один раз на пачку: очки постов и задачу уведомлений.
+
+    При повторе журнала после падения пропускаются записи, уже попавшие
+    в базу: у каждой записи свой id, он сохраняется в buffer_id.
+    """
+    posts = set(Post.objects.filter(
+        pk__in={entry['post'] for entry in entries},
+    ).values_list('pk', flat=True))
+    authors = set(User.objects.filter(
+        pk__in={entry['author'] for entry in entries},
+    ).values_list('pk', flat=True))
+    saved = set()
+    if replay:
+        saved = {
+            buffer_id.hex for buffer_id in Comment.objects.filter(
+                buffer_id__in=[entry['id'] for entry in entries],
+            ).values_list('buffer_id', flat=True)
+        }
+    comments, created = [], []
+    for entry in entries:
+        if entry['post'] not in posts or entry['author'] not in authors:
+            continue
+        if entry['id'] in saved:
+            continue
+        comments.append(Comment(post_id=entry['post'],
+                                author_id=entry['author'],
+                                text=entry['text'],
+                                buffer_id=entry['id']))
+        created.append(parse_datetime(entry['created']))
+    if not comments:
+        return []
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        if comments[0].pk is None:
+            # SQLite не возвращает id из bulk_create. Писатель в SQLite
+            # один, а id растут по AUTOINCREMENT, так что вставленные
+            # внутри транзакции строки — последние len(comments) id.
+            last = Comment.objects.order_by('-pk').values_list(
+                'pk', flat=True)[0]
+            for pk, comment in zip(range(last - len(comments) + 1, last + 1),
+                                   comments):
+                comment.pk = pk
+        keep_created(comments, created)
+        moments = defaultdict(list)
+        for comment in comments:
+            moments[comment.post_id].append(comment.created)
+        for post_id, created in moments.items():
+            ranking.comments_added(post_id, created)
+        enqueue('posts.notify_comments',
+                [comment.pk for comment in comments])
+    return comments
+
+
+class CommentBuffer:
+    """Копит комментарии и пишет их в базу пачками: раз в
+    COMMENT_BUFFER_INTERVAL секунд или по набору COMMENT_BUFFER_BATCH_SIZE.
+
+    Каждый комментарий сначала дописывается в журнал процесса. Перед
+    записью пачки журнал переименовывается и заводится новый, после
+    коммита файл пачки удаляется. Журналы упавших процессов
+    перечитываются потоком буфера при старте и командой
+    replay_comment_journal.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.COMMENT_BUFFER_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.name = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.lock = threading.Lock()
+        self.flushing = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.pending = []
+        self.batches = 0
+        self.failed = []
+        self.journal, self.path = self._open_journal()
+        self.thread = threading.Thread(
+            target=self._run, name='comment-buffer', daemon=True)
+        self.thread.start()
+
+    def _open_journal(self):
+        # Файл получает имя журнала только после блокировки, иначе
+        # recover() в другом процессе мог бы принять его за брошенный.
+        path = os.path.join(self.directory, f'{self.name}.journal')
+        journal = open(path + '.new', 'a')
+        _lock(journal)
+        os.rename(path + '.new', path)
+        return journal, path
+
+    def add(self, post_id, author_id, text):
+        entry = {
+            'id': uuid.uuid4().hex,
+            'post': post_id,
+            'author': author_id,
+            'text': text,
+            'created': timezone.now().isoformat(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            self.journal.write(line)
+            self.journal.flush()
+            if settings.COMMENT_BUFFER_FSYNC:
+                os.fsync(self.journal.fileno())
+            self.pending.append(entry)
+            if len(self.pending) >= settings.COMMENT_BUFFER_BATCH_SIZE:
+                self.wakeup.set()
+
+    def flush(self):
+        """Пишет накопленное в базу; возвращает число сохранённых
+        комментариев."""
+        with self.flushing:
+            with self.lock:
+                if self.pending:
+                    self.batches += 1
+                    path = self.path.replace(
+                        '.journal', f'.{self.batches}.batch')
+                    os.rename(self.path, path)
+                    self.failed.append((self.journal, path, self.pending))
+                    self.journal, self.path = self._open_journal()
+                    self.pending = []
+            saved = 0
+            while self.failed:
+                journal, path, entries = self.failed[0]
+                saved += len(save_comments(entries))
+                self.failed.pop(0)
+                os.remove(path)
+                journal.close()
+            return saved
+
+    def _run(self):
+        # Восстановление не задерживает запрос, создавший буфер.
+        try:
+            recover(self.directory)
+        except Exception:
+            logger.exception('Не удалось восстановить журналы')
+        finally:
+            connections.close_all()
+        while True:
+            self.wakeup.wait(settings.COMMENT_BUFFER_INTERVAL)
+            self.wakeup.clear()
+            if self.stopped:
+                return
+            try:
+                self.flush()
+            except Exception:
+                # Пачка остаётся в self.failed и на диске до следующей
+                # попытки.
+                logger.exception('Не удалось сохранить комментарии')
+            finally:
+                connections.close_all()
+
+    def close(self):
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join()
+        self.flush()
+        os.remove(self.path)
+        self.journal.close()
+
+
+def recover(directory):
+    """Сохраняет комментарии из журналов упавших процессов."""
+    saved = 0
+    paths = sorted(glob.glob(os.path.join(directory, '*.batch'))
+                   + glob.glob(os.path.join(directory, '*.journal')))
+    for path in paths:
+        try:
+            journal = open(path)
+        except FileNotFoundError:
+            # Журнал уже восстановил другой процесс.
+            continue
+        with journal:
+            # Файл мог быть удалён, пока ждали блокировки.
+            if not _lock(journal) or os.fstat(journal.fileno()).st_nlink == 0:
+                continue
+            entries = read_journal(journal)
+            if entries:
+                saved += len(save_comments(entries, replay=True))
+            os.remove(path)
+    return saved
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = CommentBuffer()
+            atexit.register(_buffer.close)
+        return _buffer
+
+
+def reset():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            atexit.unregister(_buffer.close)
+            _buffer.close()
+        _buffer = None
@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .images import prefetch, thumbnails_ready
+
+
+def version_key(kind, pk):
+    return f'fragment_version:{kind}:{pk}'
+
+
+def versions_cache():
+    # Версию меняет процесс, сохранивший автора или группу, а карточки
+    # кешируют все воркеры — версии должны быть видны каждому.
+    return caches[settings.POST_FRAGMENT_VERSION_CACHE]
+
+
+def bump_version(kind, pk):
+    """Меняет версию автора или группы — их карточки рендерятся заново."""
+    versions_cache().set(version_key(kind, pk), time.time_ns(), None)
+
+
+def get_versions(keys):
+    # Вытесненная версия заменяется новой, а не нулём: иначе ключ мог бы
+    # совпасть с карточкой, собранной до переименования.
+    versions = versions_cache().get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        versions_cache().set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def post_versions(post):
+    return (version_key('author', post.author_id),
+            version_key('group', post.group_id))
+
+
+def fragment_key(post, versions):
+    author, group = (versions[key] for key in post_versions(post))
+    return (f'post_fragment:{post.pk}:{post.updated.timestamp()}:'
+            f'{author}:{group}')
+
+
+def render_fragments(posts):
+    """HTML карточек постов: одним запросом к кешу берутся все готовые
+    фрагменты, рендерятся только отсутствующие. В ключ входят версии
+    автора и группы, чтобы карточки не показывали старые имена."""
+    posts = list(posts)
+    versions = get_versions(
+        {key for post in posts for key in post_versions(post)})
+    keys = {fragment_key(post, versions): post for post in posts}
+    fragments = cache.get_many(keys)
+    prefetch([
+        post.image for key, post in keys.items()
+        if key not in fragments and post.image
+    ])
+    missing = {
+        key: render_to_string('posts/includes/post_list.html',
+                              {'post': post})
+        for key, post in keys.items() if key not in fragments
+    }
+    fragments.update(missing)
+    # Карточка с исходной картинкой вместо миниатюр не кешируется, иначе
+    # самые свежие посты час отдавали бы полноразмерный файл.
+    missing = {
+        key: html for key, html in missing.items()
+        if not keys[key].image or thumbnails_ready(keys[key].image)
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_FRAGMENT_CACHE_TIMEOUT)
+    return {post.pk: mark_safe(fragments[key]) for key, post in keys.items()}
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .models import Group
+from .utils import cached_count
+
+
+def group_key(slug):
+    return f'group:{slug}'
+
+
+def feed_key(group_id):
+    return f'group_feed:{group_id}'
+
+
+def stats_keys(group_id):
+    return f'group_feed_hits:{group_id}', f'group_feed_misses:{group_id}'
+
+
+def feed_cache():
+    # Ленты сбрасывает процесс, сохранивший пост, — остальные воркеры
+    # должны видеть это сразу, а не через GROUP_FEED_CACHE_TIMEOUT.
+    return caches[settings.GROUP_FEED_CACHE]
+
+
+def get_group(slug):
+    """Группа по slug из кеша, при промахе — из БД (404, если нет)."""
+    cache, key = feed_cache(), group_key(slug)
+    group = cache.get(key)
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            raise Http404
+        cache.set(key, group, settings.GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def invalidate_group(slug):
+    feed_cache().delete(group_key(slug))
+
+
+def record(group_id, hit):
+    cache, key = feed_cache(), stats_keys(group_id)[0 if hit else 1]
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def group_stats(group_ids):
+    """{id группы: (попадания, промахи)}."""
+    keys = {group_id: stats_keys(group_id) for group_id in group_ids}
+    values = feed_cache().get_many(
+        [key for pair in keys.values() for key in pair])
+    return {
+        group_id: (values.get(hits, 0), values.get(misses, 0))
+        for group_id, (hits, misses) in keys.items()
+    }
+
+
+def invalidate_feeds(group_ids):
+    """Сбрасывает ленты групп. Список не правится на месте: get и set
+    в кеше не атомарны, и параллельные посты теряли бы id."""
+    feed_cache().delete_many(
+        [feed_key(group_id) for group_id in group_ids])
+
+
+class GroupFeed:
+    """Лента группы для пагинатора: первые GROUP_FEED_SIZE id постов и их
+    число лежат в кеше, страница в их пределах загружается одним
+    запросом по id. Дальние страницы читаются из БД как обычно."""
+
+    def __init__(self, group):
+        self.group = group
+        self.queryset = group.posts.select_related('author')
+        self.built = False
+
+    @cached_property
+    def entry(self):
+        cache, key = feed_cache(), feed_key(self.group.pk)
+        entry = cache.get(key)
+        if entry is None:
+            size = settings.GROUP_FEED_SIZE
+            ids = list(self.queryset.values_list('pk', flat=True)[:size])
+            count = len(ids) if len(ids) < size else cached_count(
+                self.queryset)
+            entry = {'ids': ids, 'count': count}
+            cache.set(key, entry, settings.GROUP_FEED_CACHE_TIMEOUT)
+            self.built = True
+        return entry
+
+    def __len__(self):
+        return self.entry['count']
+
+    def count(self):
+        """Точное число постов группы, в отличие от len()."""
+        return self.queryset.count()
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        ids = self.entry['ids']
+        if stop > len(ids) and len(ids) < self.entry['count']:
+            record(self.group.pk, hit=False)
+            return list(self.queryset[start:stop])
+        record(self.group.pk, hit=not self.built)
+        ids = ids[start:stop]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,118 @@
+from django.conf import settings
+
+MIME_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp',
+              'AVIF': 'image/avif'}
+
+
+def geometry(width):
+    ratio_width, ratio_height = settings.POST_IMAGE_RATIO
+    return width, round(width * ratio_height / ratio_width)
+
+
+def formats():
+    """Дополнительные форматы из POST_IMAGE_FORMATS, которые умеют
+    записывать и Pillow, и sorl."""
+    from PIL import Image
+    from sorl.thumbnail.base import EXTENSIONS
+    Image.init()
+    return [
+        format_ for format_ in settings.POST_IMAGE_FORMATS
+        if format_ in EXTENSIONS and format_ in Image.SAVE
+    ]
+
+
+def variants():
+    """Все пары (ширина, формат) для картинки поста. JPEG идёт последним
+    и служит запасным вариантом для <img>."""
+    return [
+        (width, format_)
+        for format_ in formats() + ['JPEG']
+        for width in settings.POST_IMAGE_WIDTHS
+    ]
+
+
+def options(format_):
+    return {'crop': 'center', 'upscale': True, 'format': format_,
+            'quality': settings.POST_IMAGE_QUALITY}
+
+
+def thumbnail(image, width, format_):
+    from sorl.thumbnail import get_thumbnail
+    return get_thumbnail(
+        image, '{}x{}'.format(*geometry(width)), **options(format_))
+
+
+def ready_thumbnail(image, width, format_):
+    """Миниатюра из kvstore или None, если её ещё не создали. Имя
+    считается так же, как в ThumbnailBackend.get_thumbnail, но файл
+    не создаётся и не проверяется на диске."""
+    from sorl.thumbnail import default
+    from sorl.thumbnail.conf import defaults, settings as sorl_settings
+    from sorl.thumbnail.images import ImageFile
+    backend = default.backend
+    thumbnail_options = options(format_)
+    for key, value in backend.default_options.items():
+        thumbnail_options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(defaults, attr):
+            thumbnail_options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(
+        ImageFile(image), '{}x{}'.format(*geometry(width)),
+        thumbnail_options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def thumbnails_ready(image):
+    """Созданы ли миниатюры: JPEG наибольшей ширины пишется последним."""
+    return ready_thumbnail(
+        image, max(settings.POST_IMAGE_WIDTHS), 'JPEG') is not None
+
+
+def generate(image):
+    """Готовит все варианты заранее, чтобы страницы брали их из kvstore:
+    сами страницы миниатюры не создают."""
+    for width, format_ in variants():
+        thumbnail(image, width, format_)
+
+
+def prefetch(sources):
+    """Загружает записи kvstore о миниатюрах картинок одной пачкой, если
+    kvstore это умеет (см. posts.kvstore)."""
+    from sorl.thumbnail import default
+    prefetch = getattr(default.kvstore, 'prefetch', None)
+    if prefetch is not None:
+        prefetch(sources)
+
+
+def picture(image):
+    """Данные для <picture>: srcset по форматам, запасной JPEG и размеры.
+    Берутся только готовые миниатюры; пока JPEG-вариантов нет (задача
+    после загрузки ещё не отработала), показывается исходная картинка."""
+    srcsets = {}
+    for width, format_ in variants():
+        ready = ready_thumbnail(image, width, format_)
+        if ready is not None:
+            srcsets.setdefault(format_, []).append(f'{ready.url} {width}w')
+    fallback = srcsets.pop('JPEG', None)
+    width, height = geometry(max(settings.POST_IMAGE_WIDTHS))
+    if fallback is None:
+        return {
+            'sources': [],
+            'src': image.url,
+            'srcset': '',
+            'sizes': settings.POST_IMAGE_SIZES,
+            'width': width,
+            'height': height,
+        }
+    return {
+        'sources': [
+            {'type': MIME_TYPES[format_], 'srcset': ', '.join(srcset)}
+            for format_, srcset in srcsets.items()
+        ],
+        'src': fallback[-1].rsplit(' ', 1)[0],
+        'srcset': ', '.join(fallback),
+        'sizes': settings.POST_IMAGE_SIZES,
+        'width': width,
+        'height': height,
+    }
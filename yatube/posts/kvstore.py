@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(CachedDBStore):
+    """Kvstore sorl с картой в памяти процесса перед кешем и базой.
+
+    Ключи миниатюр выводятся из имени исходника, а новая картинка поста
+    всегда получает новое имя, поэтому записи не устаревают и их можно
+    держать в процессе: карта ограничена THUMBNAIL_MEMORY_SIZE записями
+    и вытесняет самые давние. prefetch() загружает миниатюры всех
+    картинок страницы разом — двумя запросами к кешу и не больше чем
+    двумя к базе, после чего каждый {% post_image %} обходится без
+    запросов и обращений к диску.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, values):
+        with self.lock:
+            self.memory.update(values)
+            for key in values:
+                self.memory.move_to_end(key)
+            while len(self.memory) > settings.THUMBNAIL_MEMORY_SIZE:
+                self.memory.popitem(last=False)
+
+    def _get_raw(self, key):
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.memory.move_to_end(key)
+                return value
+        # Отсутствие не запоминается: миниатюру мог создать другой процесс.
+        value = super()._get_raw(key)
+        if value is not None:
+            self._remember({key: value})
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember({key: value})
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self.lock:
+            for key in keys:
+                self.memory.pop(key, None)
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        with self.lock:
+            self.memory.clear()
+
+    def _get_many_raw(self, keys):
+        with self.lock:
+            found = {key: self.memory[key] for key in keys
+                     if key in self.memory}
+        missing = [key for key in keys if key not in found]
+        if missing:
+            cached = self.cache.get_many(missing)
+            missing = [key for key in missing if key not in cached]
+            if missing:
+                stored = dict(KVStoreModel.objects.filter(
+                    key__in=missing).values_list('key', 'value'))
+                self.cache.set_many(
+                    {key: stored.get(key, EMPTY_VALUE) for key in missing},
+                    thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+                cached.update(stored)
+            cached = {key: value for key, value in cached.items()
+                      if value != EMPTY_VALUE}
+            self._remember(cached)
+            found.update(cached)
+        return found
+
+    def prefetch(self, sources):
+        """Загружает в память записи всех миниатюр картинок sources."""
+        keys = [
+            add_prefix(ImageFile(source).key, 'thumbnails')
+            for source in sources
+        ]
+        if not keys:
+            return
+        thumbnails = set()
+        for value in self._get_many_raw(keys).values():
+            thumbnails.update(deserialize(value))
+        self._get_many_raw([add_prefix(key) for key in thumbnails])
+
+
+def reset():
+    """Забывает карту в памяти процесса, если kvstore — этот."""
+    from sorl.thumbnail import default
+    if isinstance(default.kvstore._wrapped, KVStore):
+        with default.kvstore.lock:
+            default.kvstore.memory.clear()
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше POSTS_ARCHIVE_AFTER_DAYS дней вместе '
+            'с комментариями в архивные таблицы. Запускайте по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.POSTS_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--chunk', type=int,
+                            default=settings.POSTS_ARCHIVE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        moved = archive_posts(before, options['chunk'])
+        self.stdout.write(f'Перенесено в архив: {moved}')
@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время и число запросов страницы списка постов в '
+            'админке. Используйте на копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=0,
+            help='Сколько постов досоздать перед замером.')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        admin, _ = User.objects.get_or_create(
+            username='bench_admin',
+            defaults={'is_staff': True, 'is_superuser': True},
+        )
+        if options['posts']:
+            self._create_posts(admin, options['posts'])
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_post_changelist')
+        for page in ('1', '100'):
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    client.get(url, {'p': page})
+                    timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'p={page}: {min(timings) * 1000:.1f} мс, '
+                f'{len(queries)} запросов'
+            )
+
+    def _create_posts(self, author, total):
+        group, _ = Group.objects.get_or_create(
+            slug='bench', defaults={'title': 'bench', 'description': ''})
+        for start in range(0, total, BATCH_SIZE):
+            size = min(BATCH_SIZE, total - start)
+            Post.objects.bulk_create(
+                Post(author=author, group=group, text=f'bench {start + i}')
+                for i in range(size)
+            )
+        self.stdout.write(f'Создано постов: {total}')
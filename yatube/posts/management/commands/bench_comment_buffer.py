@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.comment_buffer import get_buffer
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает серию комментариев к одному посту: по транзакции '
+            'на комментарий и через буфер с записью пачками. Используйте '
+            'на копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(username='bench_comments')
+        post = Post.objects.filter(author=author).first()
+        if post is None:
+            post = Post.objects.create(author=author, text='Комментарии')
+        client = Client()
+        client.force_login(author)
+        url = reverse('posts:add_comment', args=[post.pk])
+        count = options['comments']
+        for buffered in (False, True):
+            before = Comment.objects.count()
+            with override_settings(COMMENT_BUFFER=buffered,
+                                   RATELIMIT_ENABLED=False):
+                start = time.perf_counter()
+                for number in range(count):
+                    client.post(url, {'text': f'Комментарий {number}'})
+                requests = time.perf_counter() - start
+                if buffered:
+                    get_buffer().flush()
+                total = time.perf_counter() - start
+            saved = Comment.objects.count() - before
+            title = 'буфер' if buffered else 'по одному'
+            self.stdout.write(
+                f'{title:10} запрос {requests / count * 1000:.2f} мс, '
+                f'всего {total:.2f} с, сохранено {saved}')
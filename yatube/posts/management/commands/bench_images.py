@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает объём картинок на странице ленты: прежний кроп '
+            '960x339 в JPEG против варианта, который браузер выберет из '
+            'srcset при заданной ширине экрана.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--viewport', type=int, nargs='+', default=[360, 768, 1280],
+            help='Ширина слота картинки в CSS-пикселях.')
+        parser.add_argument('--dpr', type=float, default=1)
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.exclude(image='').order_by('-pub_date')
+                     [:settings.POSTS_ON_PAGE])
+        if not posts:
+            self.stderr.write('Нет постов с картинками.')
+            return
+        from sorl.thumbnail import get_thumbnail
+        legacy = sum(
+            self._bytes(get_thumbnail(post.image, '960x339', crop='center',
+                                      upscale=True))
+            for post in posts
+        )
+        self.stdout.write(f'Постов с картинками: {len(posts)}')
+        self.stdout.write(f'Прежний вариант: {legacy / 1024:.1f} КБ')
+        format_ = (images.formats() + ['JPEG'])[0]
+        for viewport in options['viewport']:
+            width = self._pick(viewport * options['dpr'])
+            total = sum(
+                self._bytes(images.thumbnail(post.image, width, format_))
+                for post in posts
+            )
+            self.stdout.write(
+                f'{viewport}px: {format_} {width}w {total / 1024:.1f} КБ '
+                f'(экономия {(1 - total / legacy) * 100:.0f}%)')
+
+    @staticmethod
+    def _pick(slot):
+        widths = sorted(settings.POST_IMAGE_WIDTHS)
+        return next((width for width in widths if width >= slot), widths[-1])
+
+    @staticmethod
+    def _bytes(thumbnail):
+        return thumbnail.storage.size(thumbnail.name)
@@ -0,0 +1,68 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время до первого байта, полное время и объём '
+            'страницы поста с множеством комментариев: целиком и потоком, '
+            'без сжатия и со сжатием. Используйте на копии базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(username='bench_comments')
+        post = Post.objects.filter(author=author).first()
+        if post is None:
+            post = Post.objects.create(author=author, text='Комментарии')
+        missing = options['comments'] - post.comments.count()
+        if missing > 0:
+            Comment.objects.bulk_create(
+                (Comment(post=post, author=author, text='Комментарий ' * 20)
+                 for _ in range(missing)),
+                batch_size=500,
+            )
+        url = reverse('posts:post_detail', args=[post.pk])
+        modes = (
+            ('целиком', options['comments'] + 1),
+            ('потоком', 0),
+        )
+        for title, threshold in modes:
+            for encoding in ('identity', 'gzip', 'br'):
+                with override_settings(COMMENTS_STREAM_THRESHOLD=threshold):
+                    ttfb, total, size, used = self._measure(
+                        url, encoding, options['repeat'])
+                self.stdout.write(
+                    f'{title:8} {encoding:8} ({used}): '
+                    f'первый байт {ttfb * 1000:6.1f} мс, '
+                    f'всего {total * 1000:6.1f} мс, {size / 1024:7.1f} КБ')
+
+    @staticmethod
+    def _measure(url, encoding, repeat):
+        client = Client(HTTP_ACCEPT_ENCODING=encoding)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                chunks = iter(response.streaming_content)
+                first = next(chunks)
+                ttfb = time.perf_counter() - start
+                size = len(first) + sum(len(chunk) for chunk in chunks)
+            else:
+                ttfb = time.perf_counter() - start
+                size = len(response.content)
+            total = time.perf_counter() - start
+            if best is None or total < best[1]:
+                best = (ttfb, total, size,
+                        response.get('Content-Encoding', 'identity'))
+        return best
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import recommendations
+from posts.models import Follow, Recommendation
+
+_graph = None
+
+
+def _init_worker(indptr, indices):
+    global _graph
+    _graph = indptr, indices
+
+
+def _run(users, top):
+    return users, recommendations.recommend_batch(*_graph, users, top)
+
+
+class Command(BaseCommand):
+    help = ('Считает рекомендации подписок по графу Follow и сохраняет '
+            'top-K авторов для каждого пользователя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.RECOMMENDATIONS_WORKERS,
+                            help='0 — считать в этом же процессе.')
+        parser.add_argument('--top', type=int,
+                            default=settings.RECOMMENDATIONS_TOP)
+        parser.add_argument('--batch', type=int,
+                            default=settings.RECOMMENDATIONS_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        indptr, indices = recommendations.load_graph()
+        users = list(Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True).distinct())
+        loaded = time.perf_counter()
+        batches = [users[i:i + options['batch']]
+                   for i in range(0, len(users), options['batch'])]
+        top = options['top']
+        saved = 0
+        if options['workers']:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                    options['workers'], initializer=_init_worker,
+                    initargs=(indptr, indices)) as pool:
+                results = pool.map(_run, batches, [top] * len(batches))
+                for batch, rows in results:
+                    recommendations.save_batch(batch, rows)
+                    saved += len(rows)
+        else:
+            for batch in batches:
+                rows = recommendations.recommend_batch(
+                    indptr, indices, batch, top)
+                recommendations.save_batch(batch, rows)
+                saved += len(rows)
+        Recommendation.objects.exclude(user_id__in=Follow.objects.values(
+            'user_id')).delete()
+        self.stdout.write(
+            f'Рёбер: {len(indices)}, пользователей: {len(users)}, '
+            f'рекомендаций: {saved}; граф {loaded - start:.2f} с, '
+            f'расчёт {time.perf_counter() - loaded:.2f} с')
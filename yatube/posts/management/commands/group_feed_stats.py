@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_feeds import group_stats
+from posts.models import Group
+
+
+class Command(BaseCommand):
+    help = 'Попадания в кеш лент групп: по группам, самые посещаемые сверху.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        groups = dict(Group.objects.values_list('pk', 'slug'))
+        stats = sorted(group_stats(groups).items(),
+                       key=lambda item: -sum(item[1]))
+        for group_id, (hits, misses) in stats[:options['top']]:
+            total = hits + misses
+            if not total:
+                break
+            self.stdout.write(
+                f'{groups[group_id]:30} {total:8} запросов, '
+                f'попаданий {hits / total:6.1%}')
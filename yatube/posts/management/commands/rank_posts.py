@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import ranking
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает очки популярности постов за RANKING_WINDOW_DAYS '
+            'дней. Запускайте по расписанию.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = ranking.recompute()
+        self.stdout.write(
+            f'Постов: {count}, {time.perf_counter() - start:.2f} с '
+            f'({"numpy" if ranking.numpy is not None else "без numpy"})')
@@ -0,0 +1,17 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.comment_buffer import recover
+
+
+class Command(BaseCommand):
+    help = ('Сохраняет комментарии из журналов буфера, оставшихся от '
+            'упавших процессов. Журналы работающих процессов не трогает.')
+
+    def handle(self, *args, **options):
+        saved = 0
+        if os.path.isdir(settings.COMMENT_BUFFER_DIR):
+            saved = recover(settings.COMMENT_BUFFER_DIR)
+        self.stdout.write(f'Восстановлено комментариев: {saved}')
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import warming
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кеши перед приёмом трафика: готовит недостающие '
+            'миниатюры свежих постов и рендерит первые страницы ленты, '
+            'групп и профилей. Страницы рендерятся, только если кеш '
+            'общий (Memcached, Redis); с кешем в памяти процесса их '
+            'прогревает сам воркер при старте (WARM_UP_PAGES). '
+            'Ненулевой код выхода, если покрытие ниже --min-coverage.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int,
+                            default=settings.WARM_CACHES_PAGES)
+        parser.add_argument('--groups', type=int,
+                            default=settings.WARM_CACHES_GROUPS)
+        parser.add_argument('--profiles', type=int,
+                            default=settings.WARM_CACHES_PROFILES)
+        parser.add_argument('--thumbnails', type=int,
+                            default=settings.WARM_CACHES_THUMBNAILS)
+        parser.add_argument('--workers', type=int,
+                            default=settings.WARM_CACHES_WORKERS)
+        parser.add_argument('--thumbnail-workers', type=int,
+                            default=settings.WARM_CACHES_THUMBNAIL_WORKERS)
+        parser.add_argument('--host', default=settings.WARM_CACHES_HOST)
+        parser.add_argument('--min-coverage', type=float, default=0)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        names = warming.recent_images(options['thumbnails'])
+        before = warming.count_thumbnails()
+        errors = warming.warm_thumbnails(names, options['thumbnail_workers'])
+        for name, error in errors.items():
+            if error:
+                self.stderr.write(f'{name}: {error}')
+        ready = sum(error is None for error in errors.values())
+        self.stdout.write(
+            f'Миниатюры: {ready} картинок из {len(names)}, новых файлов '
+            f'{warming.count_thumbnails() - before}, '
+            f'{time.perf_counter() - start:.1f} с')
+
+        urls = warming.page_urls(options['pages'], options['groups'],
+                                 options['profiles'])
+        if warming.cache_is_local():
+            # Покрытие считается только по тому, что переживёт команду.
+            self.stdout.write(
+                f'Страницы: не прогреты ({len(urls)}) — кеш в памяти '
+                f'процесса, их прогревает воркер при старте (WARM_UP_PAGES)')
+            urls, rendered = [], 0
+        else:
+            rendered = self.warm_pages(urls, options)
+
+        total = len(urls) + len(names)
+        coverage = (rendered + ready) / total * 100 if total else 100
+        self.stdout.write(f'Покрытие: {coverage:.0f}%')
+        if coverage < options['min_coverage']:
+            raise CommandError(
+                f'Покрытие {coverage:.0f}% ниже {options["min_coverage"]}%')
+
+    def warm_pages(self, urls, options):
+        start = time.perf_counter()
+        pages = warming.warm_pages(urls, options['host'], options['workers'])
+        for url, (status, seconds) in pages.items():
+            if status != 200:
+                self.stderr.write(f'{url}: {status}')
+        rendered = sum(status == 200 for status, _ in pages.values())
+        slowest = max((seconds for _, seconds in pages.values()), default=0)
+        self.stdout.write(
+            f'Страницы: {rendered} из {len(urls)}, самая долгая '
+            f'{slowest * 1000:.0f} мс, {time.perf_counter() - start:.1f} с')
+        return rendered
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='buffer_id',
+            field=models.UUIDField(editable=False, null=True, unique=True, verbose_name='Id в журнале буфера'),
+        ),
+    ]
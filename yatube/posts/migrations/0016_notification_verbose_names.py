@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_comment_buffer_id'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'verbose_name': 'Уведомление', 'verbose_name_plural': 'Уведомления'},
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Дата уведомления'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.Post', verbose_name='Запись'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель'),
+        ),
+    ]
@@ -12,8 +12,13 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикации',
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -35,6 +40,8 @@ class Post(models.Model):
         blank=True,
     )
 
+    is_archived = False
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Запись'
@@ -43,6 +50,52 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:settings.TRUNCATE_TEXT_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: по ней сигналы находят ленту, из
+        # которой ушёл пост, без SELECT перед сохранением.
+        if 'group_id' in instance.__dict__:
+            instance.loaded_group_id = instance.group_id
+        return instance
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы командой archive_posts.
+    Сохраняет id и поля исходного поста, доступен только для чтения."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст')
+    pub_date = models.DateTimeField(
+        db_index=True,
+        verbose_name='Дата публикации',
+    )
+    updated = models.DateTimeField(verbose_name='Дата изменения')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts',
+    )
+    group = models.ForeignKey(
+        'Group',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        verbose_name='Группа',
+        related_name='archived_posts',
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивная запись'
+        verbose_name_plural = 'Архивные записи'
+
+    def __str__(self):
+        return self.text[:settings.TRUNCATE_TEXT_LENGTH]
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Имя группы')
@@ -76,6 +129,14 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата комментария',
     )
+    # Id записи журнала буфера комментариев: по нему повтор журнала после
+    # падения пропускает уже сохранённое.
+    buffer_id = models.UUIDField(
+        null=True,
+        unique=True,
+        editable=False,
+        verbose_name='Id в журнале буфера',
+    )
 
 
 class Follow(models.Model):
@@ -89,3 +150,81 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+        ]
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Запись',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата уведомления',
+    )
+
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.TextField(verbose_name='Комментарий')
+    created = models.DateTimeField(verbose_name='Дата комментария')
+
+
+class PostScore(models.Model):
+    """Популярность поста в логарифмической шкале (см. posts.ranking).
+    Сравнима между постами без пересчёта затухания."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+    )
+    score = models.FloatField(db_index=True)
+
+
+class Recommendation(models.Model):
+    """Автор, на которого стоит подписаться user; score — сколько авторов
+    из подписок user сами подписаны на author. Заполняется командой
+    compute_recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [models.Index(fields=['user', '-score'])]
@@ -0,0 +1,78 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.tasks import enqueue, report_progress
+
+from .group_feeds import invalidate_feeds
+from .models import ArchivedPost, Comment, Notification, Post, PostScore
+
+User = get_user_model()
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def delete_posts(post_ids):
+    """Удаляет посты пачками: зависимые строки и сами посты — одним
+    DELETE на таблицу и пачку, файлы картинок — отдельной фоновой
+    задачей, ленты групп сбрасываются раз на пачку."""
+    size = settings.MODERATION_CHUNK_SIZE
+    for done, chunk in enumerate(chunks(post_ids, size), 1):
+        posts = Post.objects.filter(pk__in=chunk).order_by()
+        with transaction.atomic():
+            rows = list(posts.values_list('image', 'group_id'))
+            for model in (Comment, Notification, PostScore):
+                model.objects.filter(post_id__in=chunk).delete()
+            # У Post есть обработчики post_delete, поэтому delete()
+            # загрузил бы каждый пост и послал сигнал на каждый;
+            # зависимые строки уже удалены, так что хватает DELETE.
+            posts._raw_delete(posts.db)
+            images = [image for image, _ in rows if image]
+            if images:
+                enqueue('posts.delete_media', images)
+            group_ids = {group_id for _, group_id in rows if group_id}
+            if group_ids:
+                transaction.on_commit(partial(invalidate_feeds, group_ids))
+        report_progress(done * size, len(post_ids))
+
+
+def regroup_posts(post_ids, group_id):
+    size = settings.MODERATION_CHUNK_SIZE
+    group_ids = {group_id}
+    for done, chunk in enumerate(chunks(post_ids, size), 1):
+        posts = Post.objects.filter(pk__in=chunk)
+        group_ids.update(posts.values_list('group_id', flat=True).distinct())
+        posts.update(group_id=group_id, updated=timezone.now())
+        report_progress(done * size, len(post_ids))
+    group_ids.discard(None)
+    invalidate_feeds(group_ids)
+
+
+def protected_authors(authors):
+    """Сотрудников и суперпользователей модерация не блокирует."""
+    return authors.filter(Q(is_staff=True) | Q(is_superuser=True))
+
+
+def ban_authors(author_ids):
+    authors = User.objects.filter(pk__in=author_ids)
+    author_ids = list(authors.exclude(
+        pk__in=protected_authors(authors).values('pk')).values_list(
+            'pk', flat=True))
+    User.objects.filter(pk__in=author_ids).update(is_active=False)
+    post_ids = list(Post.objects.filter(
+        author_id__in=author_ids).values_list('pk', flat=True))
+    delete_posts(post_ids)
+    archived = ArchivedPost.objects.filter(author_id__in=author_ids)
+    with transaction.atomic():
+        images = list(archived.exclude(image='').values_list(
+            'image', flat=True))
+        archived.delete()
+        if images:
+            enqueue('posts.delete_media', images)
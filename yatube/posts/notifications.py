@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Follow, Notification
+
+
+def unread_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+def notifications_cache():
+    # Счётчики сбрасывает процесс фоновых задач, а читают веб-воркеры,
+    # поэтому кеш должен быть общим.
+    return caches[settings.NOTIFICATIONS_CACHE]
+
+
+def unread_count(user):
+    cache, key = notifications_cache(), unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user).count()
+        cache.set(key, count, settings.NOTIFICATIONS_CACHE_TIMEOUT)
+    return count
+
+
+def mark_read(user):
+    """Удаляет уведомления, только если они есть: лента вызывает это на
+    каждой странице."""
+    if not unread_count(user):
+        return
+    Notification.objects.filter(user=user).delete()
+    notifications_cache().set(unread_key(user.pk), 0,
+                              settings.NOTIFICATIONS_CACHE_TIMEOUT)
+
+
+def fan_out(post):
+    """Создаёт отметки о новом посте для всех подписчиков автора пачками
+    по NOTIFICATIONS_BATCH_SIZE строк Follow."""
+    followers = Follow.objects.filter(author_id=post.author_id).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(followers.filter(pk__gt=last_pk).values_list(
+            'pk', 'user_id')[:settings.NOTIFICATIONS_BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        Notification.objects.bulk_create(
+            Notification(user_id=user_id, post=post)
+            for _, user_id in batch
+        )
+        notifications_cache().delete_many(
+            [unread_key(user_id) for _, user_id in batch])
@@ -0,0 +1,133 @@
+"""Популярность постов с экспоненциальным затуханием.
+
+Вклад события с весом w в момент t хранится как log(w) + k * t, где
+k = ln 2 / RANKING_HALF_LIFE. Вклады складываются через logaddexp. У всех
+постов затухание одинаковое, поэтому очки сравнимы в любой момент без
+пересчёта и индекс по ним остаётся упорядоченным.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, PostScore
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def decay_rate():
+    return math.log(2) / settings.RANKING_HALF_LIFE
+
+
+def term(weight, moment):
+    return math.log(weight) + decay_rate() * moment.timestamp()
+
+
+def logaddexp(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def seed_weight(followers):
+    """Начальный вес поста растёт с числом подписчиков автора."""
+    return 1 + settings.RANKING_FOLLOWER_WEIGHT * followers
+
+
+def post_created(post):
+    followers = Follow.objects.filter(author_id=post.author_id).count()
+    PostScore.objects.create(
+        post=post, score=term(seed_weight(followers), post.pub_date))
+
+
+def comment_added(comment):
+    comments_added(comment.post_id, [comment.created])
+
+
+def comments_added(post_id, moments):
+    """Добавляет вклад комментариев одного поста. Посты вне окна
+    RANKING_WINDOW_DAYS очков не имеют и не ранжируются."""
+    with transaction.atomic():
+        score = PostScore.objects.select_for_update().filter(
+            post_id=post_id).first()
+        if score is None:
+            return
+        for moment in moments:
+            added = term(settings.RANKING_COMMENT_WEIGHT, moment)
+            score.score = logaddexp(score.score, added)
+        score.save(update_fields=['score'])
+
+
+def compute_scores(posts, followers, comments):
+    """Очки постов по данным из БД: posts — [(id, author_id, pub_date)],
+    followers — {author_id: число подписчиков}, comments —
+    [(post_id, created)]. Возвращает {id: очки}."""
+    if numpy is not None:
+        return _compute_vectorized(posts, followers, comments)
+    scores = {
+        pk: term(seed_weight(followers.get(author_id, 0)), pub_date)
+        for pk, author_id, pub_date in posts
+    }
+    weight = settings.RANKING_COMMENT_WEIGHT
+    for post_id, created in comments:
+        if post_id in scores:
+            scores[post_id] = logaddexp(scores[post_id],
+                                        term(weight, created))
+    return scores
+
+
+def _compute_vectorized(posts, followers, comments):
+    rate = decay_rate()
+    posts = sorted(posts)
+    ids = numpy.array([pk for pk, _, _ in posts], dtype=numpy.int64)
+    published = numpy.array([date.timestamp() for _, _, date in posts])
+    authors = numpy.array([followers.get(author_id, 0)
+                           for _, author_id, _ in posts], dtype=float)
+    seed = numpy.log1p(settings.RANKING_FOLLOWER_WEIGHT * authors)
+    seed += rate * published
+    known = set(ids.tolist())
+    comments = [(post_id, created) for post_id, created in comments
+                if post_id in known]
+    if not comments:
+        return dict(zip(ids.tolist(), seed.tolist()))
+    index = numpy.searchsorted(
+        ids, numpy.array([post_id for post_id, _ in comments]))
+    terms = (math.log(settings.RANKING_COMMENT_WEIGHT)
+             + rate * numpy.array([created.timestamp()
+                                   for _, created in comments]))
+    high = seed.copy()
+    numpy.maximum.at(high, index, terms)
+    total = numpy.exp(seed - high)
+    numpy.add.at(total, index, numpy.exp(terms - high[index]))
+    return dict(zip(ids.tolist(), (high + numpy.log(total)).tolist()))
+
+
+def recompute(since=None):
+    """Пересчитывает очки постов за RANKING_WINDOW_DAYS и удаляет очки
+    более старых. Возвращает число ранжированных постов."""
+    since = since or timezone.now() - timedelta(
+        days=settings.RANKING_WINDOW_DAYS)
+    recent = Post.objects.filter(pub_date__gte=since)
+    posts = list(recent.values_list('pk', 'author_id', 'pub_date'))
+    followers = dict(Follow.objects.values('author_id').annotate(
+        count=Count('pk')).values_list('author_id', 'count'))
+    comments = Comment.objects.filter(
+        post__pub_date__gte=since).values_list('post_id', 'created')
+    scores = list(compute_scores(posts, followers, comments).items())
+    # Таблица целиком не очищается: пост, созданный после чтения, уже
+    # получил очки в post_created и потерял бы их до следующего пересчёта.
+    size = settings.RANKING_BATCH_SIZE
+    with transaction.atomic():
+        PostScore.objects.filter(post__pub_date__lt=since).delete()
+        for start in range(0, len(scores), size):
+            batch = scores[start:start + size]
+            PostScore.objects.filter(
+                post_id__in=[pk for pk, _ in batch]).delete()
+            PostScore.objects.bulk_create(
+                PostScore(post_id=pk, score=score) for pk, score in batch)
+    return len(scores)
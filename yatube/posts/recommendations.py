@@ -0,0 +1,105 @@
+"""Рекомендации подписок по графу Follow.
+
+Граф хранится в виде CSR: подписки пользователя u — это
+indices[indptr[u]:indptr[u + 1]]. Кандидаты для u — авторы, на которых
+подписаны его авторы; вес кандидата — число таких подписок.
+"""
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Follow, Recommendation
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def load_graph():
+    """(indptr, indices) по таблице Follow. Подписки на неактивных
+    (в том числе забаненных) авторов не входят в граф, поэтому такие
+    авторы не рекомендуются."""
+    edges = Follow.objects.filter(author__is_active=True).order_by(
+        'user_id', 'author_id').values_list('user_id', 'author_id')
+    if numpy is not None:
+        pairs = numpy.array(list(edges), dtype=numpy.int64).reshape(-1, 2)
+        size = int(pairs.max()) + 1 if len(pairs) else 0
+        counts = numpy.bincount(pairs[:, 0], minlength=size)
+        indptr = numpy.zeros(size + 1, dtype=numpy.int64)
+        numpy.cumsum(counts, out=indptr[1:])
+        return indptr, pairs[:, 1].copy()
+    indptr, indices = array('q', [0]), array('q')
+    for user_id, author_id in edges.iterator():
+        while len(indptr) <= user_id:
+            indptr.append(len(indices))
+        indices.append(author_id)
+    indptr.append(len(indices))
+    size = max(indices, default=-1) + 1
+    while len(indptr) <= size:
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+def recommend(indptr, indices, user, top):
+    """Top кандидатов для user: [(author_id, score)]."""
+    if user + 1 >= len(indptr):
+        return []
+    followed = indices[indptr[user]:indptr[user + 1]]
+    if numpy is None:
+        counts = Counter()
+        for author in followed:
+            counts.update(indices[indptr[author]:indptr[author + 1]])
+        for author in list(followed) + [user]:
+            counts.pop(author, None)
+        return counts.most_common(top)
+    starts = indptr[followed]
+    lengths = indptr[followed + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return []
+    # Индексы всех строк followed подряд без цикла по Python.
+    shift = numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths)
+    candidates = indices[shift + numpy.arange(total)]
+    authors, counts = numpy.unique(candidates, return_counts=True)
+    keep = (authors != user) & ~numpy.isin(authors, followed)
+    authors, counts = authors[keep], counts[keep]
+    order = numpy.argsort(-counts, kind='stable')[:top]
+    return list(zip(authors[order].tolist(), counts[order].tolist()))
+
+
+def recommend_batch(indptr, indices, users, top):
+    return [
+        (user, author, score)
+        for user in users
+        for author, score in recommend(indptr, indices, user, top)
+    ]
+
+
+def save_batch(users, rows):
+    """Заменяет рекомендации пачки пользователей. Строки вставляются
+    через executemany: объекты моделей для них не нужны."""
+    connection = connections[Recommendation.objects.db]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(Recommendation._meta.get_field(name).column)
+                        for name in ('user', 'author', 'score'))
+    sql = (f'INSERT INTO {quote(Recommendation._meta.db_table)} '
+           f'({columns}) VALUES (%s, %s, %s)')
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=users).delete()
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def for_user(user, following=()):
+    """Рекомендации для боковой колонки: один запрос по индексу
+    (user, -score). Подписки, сделанные после расчёта, и авторы,
+    забаненные после него, отбрасываются."""
+    recommendations = Recommendation.objects.filter(
+        user_id=user.pk, author__is_active=True).select_related('author')
+    return [
+        recommendation.author for recommendation in recommendations
+        if recommendation.author_id not in following
+    ][:settings.RECOMMENDATIONS_SHOWN]
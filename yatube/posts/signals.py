@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import follow_graph
+from core.follows import invalidate_following
+
+from . import group_feeds, ranking
+from .broker import get_broker, post_channels
+from .fragments import bump_version
+from .models import Comment, Follow, Group, Post, User
+
+UNKNOWN_GROUP = object()
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created:
+        channels = post_channels(instance)
+        transaction.on_commit(
+            lambda: get_broker().publish(channels, instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def score_new_post(sender, instance, created, **kwargs):
+    if created:
+        ranking.post_created(instance)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        ranking.comment_added(instance)
+
+
+def reset_feeds(group_ids):
+    group_feeds.invalidate_feeds(group_ids)
+    transaction.on_commit(lambda: group_feeds.invalidate_feeds(group_ids))
+
+
+# Ленты групп сбрасываются сразу — чтобы своя транзакция видела свои
+# посты — и ещё раз после коммита, на случай если другой запрос успел
+# собрать список до него. Список не правится на месте, поэтому
+# отменённый пост в ленте не остаётся.
+@receiver(post_save, sender=Post)
+def update_group_feed(sender, instance, created, **kwargs):
+    group_id = instance.group_id
+    if created:
+        old_group_id = None
+    else:
+        # У поста, собранного вручную, а не загруженного из базы, прежняя
+        # группа неизвестна — сбрасывается только текущая.
+        old_group_id = getattr(instance, 'loaded_group_id', UNKNOWN_GROUP)
+    instance.loaded_group_id = group_id
+    if old_group_id == group_id:
+        return
+    group_ids = {old_group_id, group_id} - {None, UNKNOWN_GROUP}
+    if group_ids:
+        reset_feeds(group_ids)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_group_feed(sender, instance, **kwargs):
+    if instance.group_id:
+        reset_feeds([instance.group_id])
+
+
+@receiver(pre_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    if instance.pk is not None:
+        old_slug = Group.objects.filter(pk=instance.pk).values_list(
+            'slug', flat=True).first()
+        if old_slug:
+            group_feeds.invalidate_group(old_slug)
+    group_feeds.invalidate_group(instance.slug)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login — карточки те же.
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_version('author', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_version('group', instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_following(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def add_to_follow_graph(sender, instance, created, **kwargs):
+    if created and settings.FOLLOW_GRAPH:
+        follow_graph.follow_added(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_from_follow_graph(sender, instance, **kwargs):
+    if settings.FOLLOW_GRAPH:
+        follow_graph.follow_removed(instance.user_id, instance.author_id)
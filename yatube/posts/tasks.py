@@ -0,0 +1,68 @@
+from django.core.mail import send_mail
+
+from core.tasks import task
+
+from . import images, moderation
+from .models import Comment, Post
+from .notifications import fan_out
+
+
+@task('posts.make_thumbnails')
+def make_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    images.generate(post.image)
+
+
+@task('posts.fan_out_post')
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out(post)
+
+
+@task('posts.notify_comment')
+def notify_comment(comment_id):
+    comment = Comment.objects.select_related(
+        'author', 'post__author',
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    author = comment.post.author
+    if not author.email or author == comment.author:
+        return
+    send_mail(
+        f'Новый комментарий к записи «{comment.post}»',
+        f'{comment.author.username}: {comment.text}',
+        None,
+        [author.email],
+    )
+
+
+@task('posts.notify_comments')
+def notify_comments(comment_ids):
+    for comment_id in comment_ids:
+        notify_comment(comment_id)
+
+
+@task('posts.delete_media')
+def delete_media(names):
+    from sorl.thumbnail import delete
+    for name in names:
+        delete(name)
+
+
+@task('posts.bulk_delete_posts')
+def bulk_delete_posts(post_ids):
+    moderation.delete_posts(post_ids)
+
+
+@task('posts.bulk_regroup_posts')
+def bulk_regroup_posts(post_ids, group_id):
+    moderation.regroup_posts(post_ids, group_id)
+
+
+@task('posts.ban_authors')
+def ban_authors(author_ids):
+    moderation.ban_authors(author_ids)
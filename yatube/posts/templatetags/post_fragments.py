@@ -0,0 +1,14 @@
+from django import template
+
+from ..fragments import render_fragments
+
+register = template.Library()
+
+
+@register.simple_tag
+def render_post(page_obj, post):
+    fragments = getattr(page_obj, 'fragments', None)
+    if fragments is None:
+        fragments = render_fragments(page_obj)
+        page_obj.fragments = fragments
+    return fragments[post.pk]
@@ -0,0 +1,10 @@
+from django import template
+
+from ..images import picture
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_image(image, lazy=True):
+    return {'image': picture(image) if image else None, 'lazy': lazy}
@@ -0,0 +1,14 @@
+from django import template
+
+from ..recommendations import for_user
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/recommendations.html',
+                        takes_context=True)
+def recommended_authors(context):
+    request = context['request']
+    if not request.user.is_authenticated:
+        return {'authors': []}
+    return {'authors': for_user(request.user, request.following)}
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from . import const
+
+User = get_user_model()
+
+CHANGELIST_URL = reverse('admin:posts_post_changelist')
+# Пользователь, оценка числа постов, посты с авторами и группами,
+# группы для формы действий и по запросу на подпись каждой из трёх групп.
+QUERIES = 7
+LONG_TEXT = 'Длинный текст поста ' * 20
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}',
+                                 description=const.GROUP_DESCRIPTION)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.admin, text=LONG_TEXT,
+                 group=self.groups[i % len(self.groups)])
+            for i in range(count)
+        )
+
+    def test_changelist_queries_do_not_grow(self):
+        """Число запросов списка не зависит от числа постов и групп на
+        странице: подписи групп запрашиваются один раз."""
+        self.create_posts(3)
+        self.client.get(CHANGELIST_URL)
+        with self.assertNumQueries(QUERIES):
+            self.client.get(CHANGELIST_URL)
+        self.create_posts(30)
+        with self.assertNumQueries(QUERIES):
+            self.client.get(CHANGELIST_URL)
+
+    def test_selected_groups_rendered(self):
+        """Выбранные группы строк видны в виджетах автокомплита."""
+        self.create_posts(3)
+        response = self.client.get(CHANGELIST_URL)
+        for group in self.groups:
+            self.assertContains(
+                response, f'<option value="{group.pk}" selected>'
+                          f'{group.title}</option>', count=1)
+
+    def test_text_truncated(self):
+        """Текст поста в списке обрезан до ADMIN_TEXT_LENGTH символов."""
+        self.create_posts(1)
+        response = self.client.get(CHANGELIST_URL)
+        short = LONG_TEXT[:settings.ADMIN_TEXT_LENGTH - 1] + '…'
+        self.assertContains(response, short)
+        self.assertNotContains(response, LONG_TEXT[
+            :settings.ADMIN_TEXT_LENGTH + 1])
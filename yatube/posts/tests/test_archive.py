@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import (ArchivedComment, ArchivedPost, Comment, Group,
+                      Notification, Post)
+from . import const
+
+User = get_user_model()
+
+
+@override_settings(POSTS_ON_PAGE=2)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.group = Group.objects.create(title=const.GROUP_TITLE,
+                                         slug=const.GROUP_SLUG,
+                                         description=const.GROUP_DESCRIPTION)
+        now = timezone.now()
+        cls.posts = []
+        for days in range(5):
+            post = Post.objects.create(author=cls.author, group=cls.group,
+                                       text=f'{const.POST_TEXT} {days}')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=days * 100))
+            cls.posts.append(post)
+        cls.old = cls.posts[-1]
+        Comment.objects.create(post=cls.old, author=cls.author,
+                               text=const.COMMENT_TEXT)
+        Notification.objects.create(post=cls.old, user=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_archive_moves_old_posts(self):
+        """Старые посты переезжают в архив вместе с комментариями."""
+        moved = archive_posts(timezone.now() - timedelta(days=150),
+                              chunk_size=2)
+        self.assertEqual(moved, 3)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, self.old.text)
+        self.assertEqual(
+            list(archived.comments.values_list('text', flat=True)),
+            [const.COMMENT_TEXT])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+
+    def test_feeds_span_archive(self):
+        """Ленты продолжаются архивом за концом горячей таблицы."""
+        archive_posts(timezone.now() - timedelta(days=150))
+        urls = (const.MAIN_URL, const.GROUP_URL, const.PROFILE_URL)
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertEqual(first.paginator.count, 5)
+                self.assertEqual(
+                    [post.pk for post in first],
+                    [post.pk for post in self.posts[:2]])
+                self.assertFalse(any(post.is_archived for post in first))
+                second = self.client.get(url, {'page': 2}).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in second],
+                    [post.pk for post in self.posts[2:4]])
+                self.assertTrue(all(post.is_archived for post in second))
+
+    @override_settings(POSTS_EXACT_COUNT_LIMIT=0)
+    def test_stale_hot_count(self):
+        """Устаревшее число горячих постов не сдвигает границу с архивом."""
+        self.client.get(const.MAIN_URL)
+        archive_posts(timezone.now() - timedelta(days=150))
+        second = self.client.get(const.MAIN_URL, {'page': 2})
+        self.assertEqual(
+            [post.pk for post in second.context['page_obj']],
+            [post.pk for post in self.posts[2:4]])
+
+    def test_first_page_does_not_read_archive(self):
+        """Первая страница не читает архив, если хватает горячих постов."""
+        archive_posts(timezone.now() - timedelta(days=150))
+        self.client.get(const.MAIN_URL)
+        with self.assertNumQueries(2):
+            self.client.get(const.MAIN_URL)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается без формы комментария."""
+        archive_posts(timezone.now() - timedelta(days=150))
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old.pk]))
+        self.assertContains(response, self.old.text)
+        self.assertContains(response, const.COMMENT_TEXT)
+        self.assertNotContains(response, 'Добавить комментарий')
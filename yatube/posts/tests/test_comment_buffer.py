@@ -0,0 +1,125 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+
+from .. import comment_buffer
+from ..comment_buffer import get_buffer, recover
+from ..models import Comment, Post, PostScore
+from . import const
+
+User = get_user_model()
+
+JOURNAL_DIR = tempfile.mkdtemp()
+
+
+@override_settings(COMMENT_BUFFER=True, COMMENT_BUFFER_DIR=JOURNAL_DIR,
+                   COMMENT_BUFFER_INTERVAL=3600, COMMENT_BUFFER_FSYNC=False)
+class CommentBufferTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(JOURNAL_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username=const.AUTHOR_USERNAME)
+        self.post = Post.objects.create(author=self.author,
+                                        text=const.POST_TEXT)
+        self.addCleanup(comment_buffer.reset)
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('posts:add_comment', args=[self.post.pk])
+
+    def write_journal(self, name, texts, post=None, ids=None, created=None):
+        path = os.path.join(JOURNAL_DIR, name)
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        created = created or timezone.now()
+        with open(path, 'w') as journal:
+            for text, entry_id in zip(texts, ids):
+                journal.write(json.dumps({
+                    'id': entry_id,
+                    'post': (post or self.post).pk,
+                    'author': self.author.pk,
+                    'text': text,
+                    'created': created.isoformat(),
+                }) + '\n')
+        return path
+
+    def test_comments_saved_in_batch(self):
+        """Комментарии пишутся пачкой с одной задачей уведомлений."""
+        score = PostScore.objects.get(post=self.post).score
+        for number in range(3):
+            response = self.client.post(self.url, {'text': f'c{number}'})
+            self.assertRedirects(
+                response, reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertFalse(Comment.objects.exists())
+        with open(get_buffer().path) as journal:
+            self.assertEqual(len(journal.readlines()), 3)
+
+        self.assertEqual(get_buffer().flush(), 3)
+        comments = list(Comment.objects.order_by('pk'))
+        self.assertEqual([comment.text for comment in comments],
+                         ['c0', 'c1', 'c2'])
+        task = Task.objects.get(name='posts.notify_comments')
+        self.assertEqual(json.loads(task.args),
+                         [[comment.pk for comment in comments]])
+        self.assertGreater(PostScore.objects.get(post=self.post).score,
+                           score)
+        self.assertEqual(os.listdir(JOURNAL_DIR),
+                         [os.path.basename(get_buffer().path)])
+
+    def test_invalid_comment_not_buffered(self):
+        """Невалидная форма не попадает в журнал."""
+        self.client.post(self.url, {'text': ''})
+        with open(get_buffer().path) as journal:
+            self.assertEqual(journal.read(), '')
+        self.assertEqual(get_buffer().flush(), 0)
+
+    def test_recover_orphan_journals(self):
+        """Брошенные журналы сохраняются без повторов, чужие живые —
+        не трогаются."""
+        saved_id = uuid.uuid4().hex
+        self.write_journal('1-dead.1.batch', ['lost', 'saved', 'saved'],
+                           ids=[uuid.uuid4().hex, saved_id,
+                                uuid.uuid4().hex])
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='saved', buffer_id=saved_id)
+        gone = Post.objects.create(author=self.author, text='gone')
+        self.write_journal('1-dead.journal', ['deleted post'], post=gone)
+        gone.delete()
+        live = self.write_journal('2-live.journal', ['live'])
+        with open(live) as journal:
+            fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.assertEqual(recover(JOURNAL_DIR), 2)
+        self.assertEqual(sorted(Comment.objects.values_list(
+            'text', flat=True)), ['lost', 'saved', 'saved'])
+        self.assertEqual(os.listdir(JOURNAL_DIR), ['2-live.journal'])
+        os.remove(live)
+
+    def test_recovered_comment_keeps_time(self):
+        """Комментарий из журнала получает время отправки, а не время
+        восстановления."""
+        created = timezone.now() - timedelta(hours=3)
+        self.write_journal('4-dead.journal', ['old'], created=created)
+        self.assertEqual(recover(JOURNAL_DIR), 1)
+        self.assertEqual(Comment.objects.get().created, created)
+
+    def test_recover_skips_journal_taken_by_another_process(self):
+        """Журнал, который успел восстановить и удалить другой процесс,
+        пропускается без ошибки."""
+        gone = os.path.join(JOURNAL_DIR, '3-gone.journal')
+        with mock.patch('posts.comment_buffer.glob.glob',
+                        side_effect=[[gone], []]):
+            self.assertEqual(recover(JOURNAL_DIR), 0)
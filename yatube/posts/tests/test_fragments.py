@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+from ..fragments import (fragment_key, get_versions, post_versions,
+                         version_key)
+from ..fragments import render_fragments
+from ..models import Group, Post
+from . import const
+
+User = get_user_model()
+
+
+class PostFragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.posts = [
+            Post.objects.create(author=cls.author,
+                                text=f'{const.POST_TEXT}{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fragments_are_cached(self):
+        """Фрагменты кешируются и повторно не рендерятся."""
+        fragments = render_fragments(self.posts)
+        for post in self.posts:
+            self.assertIn(post.text, fragments[post.pk])
+            versions = get_versions(post_versions(post))
+            self.assertEqual(cache.get(fragment_key(post, versions)),
+                             fragments[post.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(render_fragments(self.posts), fragments)
+
+    def test_edit_changes_fragment(self):
+        """После редактирования пост рендерится заново."""
+        post = Post.objects.get(pk=self.posts[0].pk)
+        render_fragments([post])
+        post.text = const.NEW_POST_TEXT
+        post.save()
+        self.assertIn(const.NEW_POST_TEXT, render_fragments([post])[post.pk])
+
+    def test_author_rename_changes_fragment(self):
+        """После смены имени автора карточки рендерятся заново."""
+        render_fragments(self.posts)
+        self.author.first_name = 'Новое'
+        self.author.last_name = 'Имя'
+        self.author.save()
+        fragments = render_fragments(self.posts)
+        for post in self.posts:
+            self.assertIn('Новое Имя', fragments[post.pk])
+
+    def test_group_save_changes_fragment_key(self):
+        """Изменение группы меняет ключи карточек её постов."""
+        group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRIPTION,
+        )
+        post = Post.objects.create(author=self.author, text=const.POST_TEXT,
+                                   group=group)
+        key = fragment_key(post, get_versions(post_versions(post)))
+        group.title = const.NEW_GROUP_TITLE
+        group.save()
+        self.assertNotEqual(
+            fragment_key(post, get_versions(post_versions(post))), key)
+
+    @override_settings(POST_FRAGMENT_VERSION_CACHE='shared', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'worker'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'fragment-versions'},
+    })
+    def test_versions_in_shared_cache(self):
+        """Версии хранятся в POST_FRAGMENT_VERSION_CACHE."""
+        caches['default'].clear()
+        caches['shared'].clear()
+        render_fragments(self.posts)
+        key = version_key('author', self.author.pk)
+        version = caches['shared'].get(key)
+        self.assertIsNotNone(version)
+        self.assertIsNone(caches['default'].get(key))
+        self.author.save()
+        self.assertNotEqual(caches['shared'].get(key), version)
@@ -0,0 +1,137 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+
+from ..group_feeds import feed_key, group_key, group_stats
+from ..models import Group, Post
+from . import const
+
+User = get_user_model()
+
+
+@override_settings(POSTS_ON_PAGE=2, GROUP_FEED_SIZE=4)
+class GroupFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.group = Group.objects.create(title=const.GROUP_TITLE,
+                                         slug=const.GROUP_SLUG,
+                                         description=const.GROUP_DESCRIPTION)
+        cls.new_group = Group.objects.create(
+            title=const.NEW_GROUP_TITLE, slug=const.NEW_GROUP_SLUG,
+            description=const.NEW_GROUP_DESCRIPTION)
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'{const.POST_TEXT} {i}')
+            for i in range(6)
+        ][::-1]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def page(self, number=1):
+        return self.client.get(const.GROUP_URL,
+                               {'page': number}).context['page_obj']
+
+    def test_cached_feed_needs_one_query(self):
+        """Повторный показ ленты группы — один запрос постов по id."""
+        self.page()
+        with self.assertNumQueries(1):
+            page_obj = self.page()
+        self.assertEqual(list(page_obj), self.posts[:2])
+        self.assertEqual(list(self.page(3)), self.posts[4:])
+        self.assertEqual(group_stats([self.group.pk]),
+                         {self.group.pk: (1, 2)})
+
+    def test_group_lookup_cache(self):
+        """Группа берётся из кеша и сбрасывается при изменении."""
+        self.page()
+        self.group.title = const.NEW_GROUP_TITLE
+        self.group.save()
+        response = self.client.get(const.GROUP_URL)
+        self.assertEqual(response.context['group'].title,
+                         const.NEW_GROUP_TITLE)
+
+    @override_settings(GROUP_FEED_CACHE='shared', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'worker'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'group-feeds'},
+    })
+    def test_feed_in_shared_cache(self):
+        """Лента и группа лежат в GROUP_FEED_CACHE, общем для воркеров."""
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.page()
+        for key in (feed_key(self.group.pk), group_key(self.group.slug)):
+            self.assertIsNotNone(caches['shared'].get(key))
+            self.assertIsNone(caches['default'].get(key))
+        Post.objects.create(author=self.author, group=self.group,
+                            text=const.NEW_POST_TEXT)
+        self.assertIsNone(caches['shared'].get(feed_key(self.group.pk)))
+
+    def test_stats_command(self):
+        """Команда выводит долю попаданий по группам."""
+        for _ in range(4):
+            self.page()
+        stdout = StringIO()
+        call_command('group_feed_stats', stdout=stdout)
+        self.assertIn(const.GROUP_SLUG, stdout.getvalue())
+        self.assertIn('75.0%', stdout.getvalue())
+
+
+@override_settings(POSTS_ON_PAGE=2, GROUP_FEED_SIZE=4)
+class GroupFeedChangesTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(
+            username=const.AUTHOR_USERNAME)
+        self.group = Group.objects.create(
+            title=const.GROUP_TITLE, slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRIPTION)
+        self.new_group = Group.objects.create(
+            title=const.NEW_GROUP_TITLE, slug=const.NEW_GROUP_SLUG,
+            description=const.NEW_GROUP_DESCRIPTION)
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'{const.POST_TEXT} {i}')
+            for i in range(6)
+        ][::-1]
+
+    def page(self, number=1):
+        return self.client.get(const.GROUP_URL,
+                               {'page': number}).context['page_obj']
+
+    def test_feed_follows_changes(self):
+        """Новые, перенесённые и удалённые посты сразу видны в ленте."""
+        self.page()
+        post = Post.objects.create(author=self.author, group=self.group,
+                                   text=const.NEW_POST_TEXT)
+        page_obj = self.page()
+        self.assertEqual(list(page_obj), [post, self.posts[0]])
+        self.assertEqual(page_obj.paginator.count, 7)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.new_group
+        with self.assertNumQueries(1):
+            post.save()
+        self.posts[0].delete()
+        page_obj = self.page()
+        self.assertEqual(list(page_obj), self.posts[1:3])
+        self.assertEqual(page_obj.paginator.count, 5)
+
+    def test_rolled_back_post_not_counted(self):
+        """Отменённый пост не попадает в ленту группы."""
+        self.page()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            Post.objects.create(author=self.author, group=self.group,
+                                text=const.NEW_POST_TEXT)
+            raise DatabaseError
+        self.assertEqual(self.page().paginator.count, 6)
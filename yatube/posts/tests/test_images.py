@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import images, kvstore
+from ..fragments import render_fragments
+from ..models import Post
+from . import const
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WIDTHS=(320, 960),
+                   POST_IMAGE_FORMATS=('AVIF', 'WEBP', 'UNKNOWN'))
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.author, text=const.POST_TEXT,
+            image=SimpleUploadedFile('small.gif', const.IMAGE, 'image/gif'),
+        )
+        images.generate(cls.post.image)
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.pk])
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        kvstore.reset()
+
+    def test_variants(self):
+        """Варианты строятся для всех ширин и поддерживаемых форматов."""
+        variants = images.variants()
+        self.assertNotIn('UNKNOWN', {format_ for _, format_ in variants})
+        self.assertIn((320, 'WEBP'), variants)
+        self.assertEqual(variants[-1], (960, 'JPEG'))
+        self.assertEqual(images.geometry(320), (320, 113))
+
+    def test_feed_markup(self):
+        """В ленте картинка с srcset, WebP, размерами и ленивой загрузкой."""
+        content = Client().get(const.MAIN_URL).content.decode()
+        self.assertIn('type="image/webp"', content)
+        self.assertIn(' 320w, ', content)
+        self.assertIn('width="960" height="339"', content)
+        self.assertIn('loading="lazy"', content)
+
+    def test_detail_loads_eagerly(self):
+        """На странице поста картинка грузится сразу."""
+        content = Client().get(self.detail_url).content.decode()
+        self.assertIn('srcset=', content)
+        self.assertNotIn('loading="lazy"', content)
+
+    def test_missing_thumbnails_not_generated_on_render(self):
+        """Без готовых миниатюр показывается исходная картинка, а сами
+        миниатюры при рендере не создаются."""
+        post = Post.objects.create(
+            author=self.author, text=const.POST_TEXT,
+            image=SimpleUploadedFile('fresh.gif', const.IMAGE, 'image/gif'),
+        )
+        with mock.patch('sorl.thumbnail.base.ThumbnailBackend.'
+                        'get_thumbnail') as thumbnail:
+            content = Client().get(
+                reverse('posts:post_detail', args=[post.pk])).content
+        thumbnail.assert_not_called()
+        self.assertIn(f'src="{post.image.url}"', content.decode())
+        self.assertNotIn('type="image/webp"', content.decode())
+
+    def test_fallback_card_not_cached(self):
+        """Карточка с исходной картинкой не кешируется: после создания
+        миниатюр лента сразу показывает их."""
+        post = Post.objects.create(
+            author=self.author, text=const.POST_TEXT,
+            image=SimpleUploadedFile('new.gif', const.IMAGE, 'image/gif'),
+        )
+        self.assertIn(f'src="{post.image.url}"',
+                      render_fragments([post])[post.pk])
+        images.generate(post.image)
+        self.assertIn('type="image/webp"',
+                      render_fragments([post])[post.pk])
+        with self.assertNumQueries(0):
+            render_fragments([post])
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default
+
+from .. import images, kvstore
+from ..fragments import render_fragments
+from ..models import Post
+from . import const
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WIDTHS=(320, 960))
+class KVStoreTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=const.POST_TEXT,
+                image=SimpleUploadedFile(
+                    f'small{number}.gif', const.IMAGE, 'image/gif'),
+            )
+            for number in range(3)
+        ]
+        for post in cls.posts:
+            images.generate(post.image)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        kvstore.reset()
+        self.addCleanup(kvstore.reset)
+
+    def no_disk(self):
+        return mock.patch.multiple(
+            FileSystemStorage,
+            exists=mock.Mock(side_effect=AssertionError('stat')),
+            size=mock.Mock(side_effect=AssertionError('stat')),
+            open=mock.Mock(side_effect=AssertionError('open')),
+        )
+
+    def test_page_prefetched_in_batch(self):
+        """Миниатюры всех постов страницы грузятся двумя запросами, после
+        чего картинки собираются без базы и диска."""
+        with self.assertNumQueries(2):
+            images.prefetch([post.image for post in self.posts])
+        with self.assertNumQueries(0), self.no_disk():
+            pictures = [images.picture(post.image) for post in self.posts]
+        self.assertEqual(len({picture['src'] for picture in pictures}), 3)
+
+    def test_fragments_use_prefetch(self):
+        """Рендер карточек страницы не делает запросов на каждую
+        миниатюру."""
+        with self.assertNumQueries(2), self.no_disk():
+            fragments = render_fragments(self.posts)
+        self.assertIn('srcset', fragments[self.posts[0].pk])
+
+    def test_memory_limit(self):
+        """Карта в памяти не растёт сверх THUMBNAIL_MEMORY_SIZE."""
+        with override_settings(THUMBNAIL_MEMORY_SIZE=2):
+            images.prefetch([post.image for post in self.posts])
+            self.assertEqual(len(default.kvstore.memory), 2)
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import broker, views
+from ..models import Group, Post
+from . import const
+
+User = get_user_model()
+
+LIVE_INDEX_URL = reverse('posts:live_index')
+
+
+class BrokerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(author=cls.author,
+                                       text=const.POST_TEXT)
+        cls.group_post = Post.objects.create(
+            author=cls.author, text=const.POST_TEXT, group=cls.group)
+
+    def test_local_broker_filters_channels(self):
+        """Локальный брокер отдаёт только события нужных каналов."""
+        local = broker.LocalBroker()
+        local.publish(broker.post_channels(self.post), self.post.pk)
+        local.publish(broker.post_channels(self.group_post),
+                      self.group_post.pk)
+        self.assertEqual(
+            local.listen([f'group:{const.GROUP_SLUG}'], 0, timeout=0),
+            [(2, self.group_post.pk)],
+        )
+        self.assertEqual(len(local.listen(['index'], 0, timeout=0)), 2)
+        self.assertEqual(local.listen(['index'], 2, timeout=0), [])
+
+    def test_database_broker(self):
+        """Межпроцессный брокер находит новые посты по каналам."""
+        database = broker.DatabaseBroker()
+        self.assertEqual(
+            database.listen([f'group:{const.GROUP_SLUG}'], 0, timeout=0),
+            [(self.group_post.pk, self.group_post.pk)],
+        )
+        self.assertEqual(
+            database.listen([f'author:{self.author.pk}'], self.post.pk,
+                            timeout=0),
+            [(self.group_post.pk, self.group_post.pk)],
+        )
+
+    @override_settings(LIVE_BROKER='posts.broker.DatabaseBroker',
+                       LIVE_HEARTBEAT=0)
+    def test_live_index_streams_post_ids(self):
+        """SSE-поток отдаёт id новых постов после Last-Event-ID."""
+        broker._broker = None
+        self.addCleanup(setattr, broker, '_broker', None)
+        response = Client().get(LIVE_INDEX_URL,
+                                HTTP_LAST_EVENT_ID=str(self.post.pk))
+        self.addCleanup(response.close)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        next(stream)
+        self.assertEqual(
+            next(stream),
+            f'id: {self.group_post.pk}\ndata: {self.group_post.pk}\n\n'
+            .encode(),
+        )
+
+    @override_settings(LIVE_BROKER='posts.broker.DatabaseBroker',
+                       LIVE_HEARTBEAT=0)
+    def test_new_connection_starts_at_head(self):
+        """Без Last-Event-ID старые посты не отдаются, поток начинается с
+        последнего id."""
+        broker._broker = None
+        self.addCleanup(setattr, broker, '_broker', None)
+        response = Client().get(LIVE_INDEX_URL)
+        self.addCleanup(response.close)
+        stream = iter(response.streaming_content)
+        self.assertIn(f'id: {self.group_post.pk}\n'.encode(), next(stream))
+        self.assertEqual(next(stream), b': ping\n\n')
+
+    @override_settings(LIVE_BROKER='posts.broker.DatabaseBroker',
+                       LIVE_HEARTBEAT=0)
+    def test_stream_releases_connection(self):
+        """Поток не держит соединение с базой: оно закрывается до первого
+        сообщения и после каждого опроса брокера."""
+        broker._broker = None
+        self.addCleanup(setattr, broker, '_broker', None)
+        response = Client().get(LIVE_INDEX_URL)
+        self.addCleanup(response.close)
+        stream = iter(response.streaming_content)
+        with mock.patch.object(connection, 'close') as close:
+            next(stream)
+            self.assertEqual(close.call_count, 1)
+            next(stream)
+            self.assertEqual(close.call_count, 2)
+
+    @override_settings(LIVE_BROKER='posts.broker.DatabaseBroker',
+                       LIVE_MAX_STREAMS=1, LIVE_RETRY=3)
+    @mock.patch.object(views, '_live_streams', 0)
+    def test_streams_limited_per_process(self):
+        """Сверх LIVE_MAX_STREAMS потоков отвечаем 503 с Retry-After, а
+        закрытый поток освобождает место."""
+        broker._broker = None
+        self.addCleanup(setattr, broker, '_broker', None)
+        client = Client()
+        response = client.get(LIVE_INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+        busy = client.get(LIVE_INDEX_URL)
+        self.assertEqual(busy.status_code, 503)
+        self.assertEqual(busy['Retry-After'], '3')
+        response.close()
+        response.close()
+        response = client.get(LIVE_INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(views._live_streams, 1)
+        response.close()
+
+    def test_local_broker_head(self):
+        """Новый слушатель локального брокера начинает с последнего
+        события."""
+        local = broker.LocalBroker()
+        self.assertEqual(local.head(), 0)
+        local.publish(broker.post_channels(self.post), self.post.pk)
+        self.assertEqual(local.listen(['index'], local.head(), timeout=0),
+                         [])
+
+    def test_post_fragment(self):
+        """Фрагмент поста рендерится отдельно от ленты."""
+        response = Client().get(
+            reverse('posts:post_fragment', args=[self.post.pk]))
+        self.assertContains(response, const.POST_TEXT)
@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import moderation
+from ..models import ArchivedPost, Comment, Group, Post, PostScore
+from . import const
+
+User = get_user_model()
+
+
+@override_settings(MODERATION_CHUNK_SIZE=2)
+class ModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.not_author = User.objects.create_user(
+            username=const.NOT_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRIPTION,
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=const.POST_TEXT)
+            for _ in range(5)
+        ]
+        cls.other_post = Post.objects.create(author=cls.not_author,
+                                             text=const.POST_TEXT)
+        for post in cls.posts:
+            Comment.objects.create(post=post, author=cls.not_author,
+                                   text=const.COMMENT_TEXT)
+
+    def test_delete_posts(self):
+        """Посты удаляются пачками вместе с комментариями."""
+        moderation.delete_posts([post.pk for post in self.posts])
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_is_set_based(self):
+        """На пачку — фиксированное число запросов, посты не загружаются
+        и сигналы удаления не посылаются."""
+        self.assertEqual(PostScore.objects.count(), len(self.posts) + 1)
+        with mock.patch('posts.signals.reset_feeds') as reset_feeds, \
+                self.assertNumQueries(3 * 7):
+            moderation.delete_posts([post.pk for post in self.posts])
+        reset_feeds.assert_not_called()
+        self.assertFalse(PostScore.objects.filter(
+            post_id__in=[post.pk for post in self.posts]).exists())
+
+    def test_regroup_posts(self):
+        """Посты переносятся в группу одним UPDATE на пачку."""
+        moderation.regroup_posts([post.pk for post in self.posts],
+                                 self.group.pk)
+        self.assertEqual(self.group.posts.count(), len(self.posts))
+
+    def test_ban_authors(self):
+        """Заблокированный автор теряет доступ и все посты."""
+        moderation.ban_authors([self.author.pk])
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(self.author.posts.exists())
+        self.assertTrue(Post.objects.filter(pk=self.other_post.pk).exists())
+
+    def test_ban_skips_staff_and_deletes_archived_media(self):
+        """Сотрудники не блокируются; картинки архивных постов
+        блокируемого автора удаляются в фоне."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        ArchivedPost.objects.create(
+            id=10 ** 6, text=const.POST_TEXT, pub_date=timezone.now(),
+            updated=timezone.now(), author=self.author, image='posts/old.gif')
+        with mock.patch('posts.moderation.enqueue') as enqueue:
+            moderation.ban_authors([self.author.pk, staff.pk])
+        staff.refresh_from_db()
+        self.assertTrue(staff.is_active)
+        self.assertFalse(ArchivedPost.objects.exists())
+        enqueue.assert_called_with('posts.delete_media', ['posts/old.gif'])
+
+
+@override_settings(MODERATION_TASK_SIZE=2)
+class ModerationActionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRIPTION,
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.admin, text=const.POST_TEXT)
+            for _ in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        patcher = mock.patch('posts.admin.enqueue')
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def act(self, action, posts=None, **data):
+        return self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': action,
+            '_selected_action': [post.pk for post in posts or self.posts],
+            **data,
+        }, follow=True)
+
+    def test_ids_split_into_tasks(self):
+        """Выбранные посты делятся на задачи по MODERATION_TASK_SIZE."""
+        self.act('bulk_regroup', group=self.group.pk)
+        chunks = [call.args[1] for call in self.enqueue.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(sorted(sum(chunks, [])),
+                         sorted(post.pk for post in self.posts))
+        for call in self.enqueue.call_args_list:
+            self.assertEqual(call.args[0], 'posts.bulk_regroup_posts')
+            self.assertEqual(call.args[2], self.group.pk)
+
+    def test_regroup_requires_group(self):
+        """Без выбранной группы перенос не ставится в очередь."""
+        response = self.act('bulk_regroup')
+        self.enqueue.assert_not_called()
+        self.assertContains(response, 'Выберите группу')
+
+    def test_ban_skips_self_and_staff(self):
+        """Модератор не блокирует себя и других сотрудников."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        author = User.objects.create_user(username='author')
+        posts = self.posts + [
+            Post.objects.create(author=user, text=const.POST_TEXT)
+            for user in (staff, author)
+        ]
+        response = self.act('ban_authors', posts)
+        self.enqueue.assert_called_once_with('posts.ban_authors',
+                                             [author.pk])
+        self.assertContains(response, 'admin, staff')
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Follow, Notification, Post
+from ..notifications import fan_out, unread_count, unread_key
+from . import const
+
+User = get_user_model()
+
+UNREAD_URL = reverse('posts:unread_notifications')
+
+
+@override_settings(NOTIFICATIONS_BATCH_SIZE=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.followers = [
+            User.objects.create_user(username=f'follower{i}')
+            for i in range(5)
+        ]
+        for follower in cls.followers:
+            Follow.objects.create(user=follower, author=cls.author)
+        cls.post = Post.objects.create(author=cls.author,
+                                       text=const.POST_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.follower = self.followers[0]
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def test_fan_out_notifies_every_follower(self):
+        """Каждый подписчик получает отметку о новом посте."""
+        self.assertEqual(unread_count(self.follower), 0)
+        fan_out(self.post)
+        self.assertEqual(
+            Notification.objects.filter(post=self.post).count(),
+            len(self.followers),
+        )
+        self.assertEqual(unread_count(self.follower), 1)
+        self.assertEqual(Notification.objects.filter(user=self.author)
+                         .count(), 0)
+
+    @override_settings(NOTIFICATIONS_CACHE='shared', CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'worker'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                   'LOCATION': 'notifications'},
+    })
+    def test_counter_in_shared_cache(self):
+        """Счётчик лежит в NOTIFICATIONS_CACHE и сбрасывается там же."""
+        caches['shared'].clear()
+        self.assertEqual(unread_count(self.follower), 0)
+        self.assertEqual(
+            caches['shared'].get(unread_key(self.follower.pk)), 0)
+        fan_out(self.post)
+        self.assertIsNone(caches['shared'].get(unread_key(self.follower.pk)))
+        self.assertEqual(unread_count(self.follower), 1)
+
+    def test_follow_index_marks_read(self):
+        """Просмотр ленты подписок сбрасывает счётчик."""
+        fan_out(self.post)
+        response = self.client.get(UNREAD_URL)
+        self.assertEqual(response.json(), {'unread': 1})
+        self.client.get(const.FOLLOW_INDEX_URL)
+        with self.assertNumQueries(1):
+            response = self.client.get(UNREAD_URL)
+        self.assertEqual(response.json(), {'unread': 0})
+
+    def test_follow_index_without_unread_does_not_delete(self):
+        """Без непрочитанных лента подписок не удаляет уведомления."""
+        self.client.get(UNREAD_URL)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(const.FOLLOW_INDEX_URL)
+        self.assertFalse(any(query['sql'].startswith('DELETE')
+                             for query in queries.captured_queries))
@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 
 from ..models import Group, Post
+from ..utils import CachedCountPaginator
 from . import const
 
 User = get_user_model()
@@ -27,6 +29,7 @@ class PaginatorViewsTest(TestCase):
         cls.test_list = [const.MAIN_URL, const.GROUP_URL, const.PROFILE_URL]
 
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(self.author)
 
@@ -57,3 +60,24 @@ class PaginatorViewsTest(TestCase):
                 response = self.author_client.get(url + last_page_url)
                 self.assertEqual(len(response.context['page_obj']),
                                  posts_on_last_page)
+
+    @override_settings(POSTS_EXACT_COUNT_LIMIT=5, PAGINATOR_WINDOW=1)
+    def test_large_feed_count_is_cached(self):
+        """Для больших выборок число постов берётся из кеша."""
+        response = self.author_client.get(const.PROFILE_URL)
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         const.POSTS_COUNT_PAGINATOR_TEST)
+        Post.objects.create(author=self.author, text=const.POST_TEXT,
+                            group=self.group)
+        response = self.author_client.get(const.PROFILE_URL)
+        self.assertEqual(response.context['page_obj'].paginator.count,
+                         const.POSTS_COUNT_PAGINATOR_TEST)
+        cache.clear()
+
+    @override_settings(PAGINATOR_WINDOW=1)
+    def test_page_window(self):
+        """Пагинатор выводит только страницы вокруг текущей."""
+        paginator = CachedCountPaginator(range(100), settings.POSTS_ON_PAGE)
+        self.assertEqual(list(paginator.page_window(1)), [1, 2])
+        self.assertEqual(list(paginator.page_window(5)), [4, 5, 6])
+        self.assertEqual(list(paginator.page_window(10)), [9, 10])
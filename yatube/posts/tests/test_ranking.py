@@ -0,0 +1,103 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import ranking
+from ..models import Comment, Follow, Post, PostScore
+from . import const
+
+User = get_user_model()
+
+POPULAR_URL = reverse('posts:popular')
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.reader = User.objects.create_user(
+            username=const.NOT_AUTHOR_USERNAME)
+        cls.old = Post.objects.create(author=cls.author, text=const.POST_TEXT)
+        cls.new = Post.objects.create(author=cls.author,
+                                      text=const.NEW_POST_TEXT)
+
+    def scores(self):
+        return dict(PostScore.objects.values_list('post_id', 'score'))
+
+    def test_comments_raise_post(self):
+        """Комментарии поднимают пост выше более свежих."""
+        response = Client().get(POPULAR_URL)
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.new, self.old])
+        for _ in range(3):
+            Comment.objects.create(post=self.old, author=self.reader,
+                                   text=const.COMMENT_TEXT)
+        response = Client().get(POPULAR_URL)
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.old, self.new])
+
+    def test_followers_raise_new_posts(self):
+        """Пост автора с подписчиками стартует выше."""
+        Follow.objects.create(user=self.reader, author=self.reader)
+        Follow.objects.create(user=self.author, author=self.reader)
+        post = Post.objects.create(author=self.reader, text=const.POST_TEXT)
+        plain = Post.objects.create(author=self.author, text=const.POST_TEXT)
+        scores = self.scores()
+        self.assertGreater(scores[post.pk], scores[plain.pk])
+
+    def test_half_life(self):
+        """Вклад события вдвое меньше через RANKING_HALF_LIFE."""
+        now = timezone.now()
+        later = now + timedelta(seconds=ranking.settings.RANKING_HALF_LIFE)
+        self.assertAlmostEqual(
+            ranking.term(2, now), ranking.term(1, later), places=6)
+
+    def test_recompute_matches_incremental(self):
+        """Пакетный пересчёт даёт те же очки, что и пошаговый."""
+        Comment.objects.create(post=self.old, author=self.reader,
+                               text=const.COMMENT_TEXT)
+        incremental = self.scores()
+        with mock.patch.object(ranking, 'numpy', None):
+            self.assertEqual(ranking.recompute(), 2)
+        for pk, score in self.scores().items():
+            self.assertAlmostEqual(score, incremental[pk], places=6)
+
+    @skipUnless(ranking.numpy, 'numpy не установлен')
+    def test_vectorized_matches_python(self):
+        """Расчёт на numpy совпадает с расчётом на чистом Python."""
+        now = timezone.now()
+        posts = [(1, 1, now), (2, 2, now - timedelta(hours=5))]
+        comments = [(2, now), (2, now), (1, now - timedelta(hours=1))]
+        followers = {2: 10}
+        vectorized = ranking.compute_scores(posts, followers, comments)
+        with mock.patch.object(ranking, 'numpy', None):
+            python = ranking.compute_scores(posts, followers, comments)
+        for pk in python:
+            self.assertAlmostEqual(vectorized[pk], python[pk], places=6)
+
+    def test_recompute_drops_old_posts(self):
+        """Посты старше окна из рейтинга выпадают."""
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        ranking.recompute()
+        self.assertEqual(list(self.scores()), [self.new.pk])
+
+    def test_recompute_keeps_posts_created_meanwhile(self):
+        """Пост, созданный во время пересчёта, не теряет очки."""
+        compute_scores = ranking.compute_scores
+        created = []
+
+        def compute_and_post(*args):
+            scores = compute_scores(*args)
+            created.append(Post.objects.create(author=self.author,
+                                               text=const.POST_TEXT))
+            return scores
+
+        with mock.patch.object(ranking, 'compute_scores', compute_and_post):
+            self.assertEqual(ranking.recompute(), 2)
+        self.assertIn(created[0].pk, self.scores())
@@ -0,0 +1,94 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from .. import recommendations
+from ..models import Follow, Recommendation
+from . import const
+
+User = get_user_model()
+
+# Кто на кого подписан: reader подписан на a и b, а те — на c и d.
+GRAPH = {
+    'reader': ('a', 'b'),
+    'a': ('c', 'd', 'reader'),
+    'b': ('c',),
+    'c': ('a',),
+}
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'a', 'b', 'c', 'd')
+        }
+        for name, authors in GRAPH.items():
+            for author in authors:
+                Follow.objects.create(user=cls.users[name],
+                                      author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+
+    def recommended(self, name):
+        return [
+            (recommendation.author.username, recommendation.score)
+            for recommendation in Recommendation.objects.filter(
+                user=self.users[name])
+        ]
+
+    def test_cofollow_counts(self):
+        """Кандидаты ранжируются по числу подписок среди подписок
+        пользователя; сам пользователь и его подписки исключены."""
+        call_command('compute_recommendations', workers=0, stdout=StringIO())
+        self.assertEqual(self.recommended('reader'), [('c', 2), ('d', 1)])
+        self.assertEqual(self.recommended('c'),
+                         [('reader', 1), ('d', 1)])
+
+    def test_python_fallback_matches(self):
+        """Расчёт без numpy даёт тот же результат."""
+        with mock.patch.object(recommendations, 'numpy', None):
+            call_command('compute_recommendations', workers=0,
+                         stdout=StringIO())
+        self.assertEqual(self.recommended('reader'), [('c', 2), ('d', 1)])
+
+    def test_process_pool(self):
+        """Расчёт в пуле процессов заменяет старые рекомендации."""
+        Recommendation.objects.create(user=self.users['b'],
+                                      author=self.users['d'], score=9)
+        call_command('compute_recommendations', workers=2, batch=2,
+                     stdout=StringIO())
+        self.assertEqual(self.recommended('reader'), [('c', 2), ('d', 1)])
+        self.assertEqual(self.recommended('b'), [('a', 1)])
+
+    def test_inactive_authors_skipped(self):
+        """Неактивные авторы не рекомендуются: ни при расчёте, ни из
+        рекомендаций, посчитанных до бана."""
+        call_command('compute_recommendations', workers=0, stdout=StringIO())
+        User.objects.filter(username='c').update(is_active=False)
+        self.assertEqual(
+            recommendations.for_user(self.users['reader']),
+            [self.users['d']],
+        )
+        call_command('compute_recommendations', workers=0, stdout=StringIO())
+        self.assertEqual(self.recommended('reader'), [('d', 1)])
+
+    def test_profile_sidebar(self):
+        """Боковая колонка профиля — один запрос, без уже подписанных."""
+        call_command('compute_recommendations', workers=0, stdout=StringIO())
+        Follow.objects.create(user=self.users['reader'],
+                              author=self.users['d'])
+        client = Client()
+        client.force_login(self.users['reader'])
+        response = client.get(const.PROFILE_URL.replace(
+            const.AUTHOR_USERNAME, 'a'))
+        self.assertContains(response, 'Возможно, вам будет интересно')
+        self.assertContains(response, '/profile/c/')
+        self.assertNotContains(response, '/profile/d/')
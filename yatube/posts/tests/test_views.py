@@ -231,3 +231,19 @@ class PostViewsTests(TestCase):
         """Пост автора не появляется в ленте тех, кто на него не подписан"""
         response = self.not_author_client.get(const.FOLLOW_INDEX_URL)
         self.assertNotIn(self.post, response.context['page_obj'])
+
+    @override_settings(COMMENTS_STREAM_THRESHOLD=2, COMMENTS_STREAM_CHUNK=2)
+    def test_post_detail_streams_many_comments(self):
+        """Пост с большим числом комментариев отдаётся потоком целиком."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.not_author,
+                    text=f'{const.COMMENT_TEXT} {i}')
+            for i in range(5)
+        )
+        response = self.author_client.get(self.POST_URL)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        for i in range(5):
+            self.assertIn(f'{const.COMMENT_TEXT} {i}', content)
+        self.assertIn('csrfmiddlewaretoken', content)
+        self.assertTrue(content.rstrip().endswith('</html>'))
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from core import warmup
+
+from .. import images, kvstore
+from ..fragments import fragment_key, get_versions, post_versions
+from ..models import Follow, Group, Post
+from ..warming import page_urls
+from . import const
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_WIDTHS=(320,))
+class WarmCachesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=const.AUTHOR_USERNAME)
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.groups = [
+            Group.objects.create(title=slug, slug=slug, description=slug)
+            for slug in ('small', 'big')
+        ]
+        Post.objects.create(author=cls.author, text=const.POST_TEXT,
+                            group=cls.groups[1])
+        Post.objects.create(
+            author=cls.author, text=const.POST_TEXT, group=cls.groups[1],
+            image=SimpleUploadedFile('small.gif', const.IMAGE, 'image/gif'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        kvstore.reset()
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, 'cache'),
+                      ignore_errors=True)
+
+    def test_page_urls(self):
+        """Берутся первые страницы самых больших групп и авторов с
+        наибольшим числом подписчиков."""
+        self.assertEqual(page_urls(2, 1, 1), [
+            const.MAIN_URL,
+            const.MAIN_URL + '?page=2',
+            '/group/big/',
+            '/group/big/?page=2',
+            const.PROFILE_URL,
+            const.PROFILE_URL + '?page=2',
+        ])
+
+    def test_warm_caches(self):
+        """Команда готовит миниатюры, а страницы с кешем в памяти процесса
+        не рендерит и в покрытие не засчитывает."""
+        out = StringIO()
+        call_command('warm_caches', workers=0, thumbnail_workers=0,
+                     min_coverage=100, stdout=out)
+        output = out.getvalue()
+        self.assertIn('Миниатюры: 1 картинок из 1', output)
+        self.assertNotIn('новых файлов 0', output)
+        self.assertIn('Страницы: не прогреты (10)', output)
+        self.assertIn('Покрытие: 100%', output)
+
+    def test_warm_caches_shared_cache(self):
+        """С общим кешем команда рендерит страницы через middleware."""
+        out = StringIO()
+        with mock.patch('posts.warming.cache_is_local', return_value=False):
+            call_command('warm_caches', workers=0, thumbnail_workers=0,
+                         host='localhost', min_coverage=100, stdout=out)
+        self.assertIn('Страницы: 10 из 10', out.getvalue())
+
+    @override_settings(WARM_UP_PAGES=True)
+    def test_startup_warm_up_renders_pages(self):
+        """Прогрев воркера при старте кладёт карточки постов в его кеш."""
+        post = Post.objects.first()
+        images.generate(post.image)
+        warmup.warm_pages()
+        self.assertIsNotNone(cache.get(fragment_key(
+            post, get_versions(post_versions(post)))))
+
+    def test_min_coverage(self):
+        """Битая картинка снижает покрытие и роняет команду."""
+        Post.objects.create(
+            author=self.author, text=const.POST_TEXT,
+            image=SimpleUploadedFile('broken.gif', b'broken', 'image/gif'),
+        )
+        with self.assertRaises(CommandError):
+            call_command('warm_caches', workers=0, thumbnail_workers=0,
+                         min_coverage=100, stdout=StringIO(),
+                         stderr=StringIO())
@@ -1,20 +1,32 @@
 from django.urls import path
 
-from .views import (add_comment, follow_index, group_posts, index, post_create,
-                    post_detail, post_edit, profile, profile_follow,
-                    profile_unfollow)
+from .views import (add_comment, follow_index, group_posts, index, live_follow,
+                    live_group, live_index, post_create, post_detail,
+                    popular, post_edit, post_fragment, profile,
+                    profile_follow, profile_unfollow, unread_notifications)
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', index, name='main'),
+    path('popular/', popular, name='popular'),
     path('group/<slug:slug>/', group_posts, name='group_list'),
     path('profile/<str:username>/', profile, name='profile'),
     path('posts/<int:post_id>/', post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/fragment/',
+        post_fragment,
+        name='post_fragment',
+    ),
     path('create/', post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', add_comment, name='add_comment'),
     path('follow/', follow_index, name='follow_index'),
+    path(
+        'follow/unread/',
+        unread_notifications,
+        name='unread_notifications',
+    ),
     path(
         'profile/<str:username>/follow/',
         profile_follow,
@@ -25,4 +37,7 @@ urlpatterns = [
         profile_unfollow,
         name='profile_unfollow',
     ),
+    path('live/', live_index, name='live_index'),
+    path('live/group/<slug:slug>/', live_group, name='live_group'),
+    path('live/follow/', live_follow, name='live_follow'),
 ]
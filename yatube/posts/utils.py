@@ -1,9 +1,100 @@
+import hashlib
+
 from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.functional import cached_property
+
+STREAM_MARKER = '<!-- stream -->'
+
+
+def cached_count(queryset):
+    """COUNT(*) без полного прохода по большим выборкам.
+
+    Небольшие выборки считаются точно. Для больших берётся оценка из
+    статистики СУБД (только для выборок без фильтров) или закешированный
+    на POSTS_COUNT_CACHE_TIMEOUT секунд точный подсчёт.
+    """
+    limit = settings.POSTS_EXACT_COUNT_LIMIT
+    probe = queryset.values('pk')[:limit + 1].count()
+    if probe <= limit:
+        return probe
+    estimate = _estimate_count(queryset)
+    if estimate is not None and estimate > limit:
+        return estimate
+    query = str(queryset.query).encode()
+    key = 'paginator_count:' + hashlib.md5(query).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.POSTS_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def _estimate_count(queryset):
+    query = queryset.query
+    if query.where or query.distinct:
+        return None
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'sqlite':
+        if 'sqlite_stat1' not in connection.introspection.table_names():
+            return None
+        sql = ('SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 '
+               'WHERE tbl = %s ORDER BY idx IS NOT NULL LIMIT 1')
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, не считающий COUNT(*) по всей ленте на каждый запрос
+    (см. cached_count)."""
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        return cached_count(self.object_list)
+
+    def page_window(self, number):
+        """Номера страниц вокруг текущей, не больше PAGINATOR_WINDOW с
+        каждой стороны."""
+        window = settings.PAGINATOR_WINDOW
+        return range(max(1, number - window),
+                     min(self.num_pages, number + window) + 1)
 
 
 def paginate(request, post_list):
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
+    paginator = CachedCountPaginator(post_list, settings.POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.page_window = paginator.page_window(page_obj.number)
     return page_obj
+
+
+def stream_render(request, template_name, context, name, parts):
+    """Отдаёт шаблон потоком: всё, кроме {{ name }}, рендерится сразу
+    (чтобы csrf-кука и сессия успели попасть в ответ), а на месте
+    {{ name }} по очереди выводятся куски из parts."""
+    context[name] = mark_safe(STREAM_MARKER)
+    head, tail = render_to_string(
+        template_name, context, request).split(STREAM_MARKER, 1)
+
+    def content():
+        yield head
+        yield from parts
+        yield tail
+
+    return StreamingHttpResponse(content())
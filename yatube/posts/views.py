@@ -1,9 +1,33 @@
+import threading
+import time
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import (DEFAULT_DB_ALIAS, IntegrityError, connections,
+                       transaction)
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+
+from core.ratelimit import ratelimit
+from core.tasks import enqueue
 
+from .archive import TieredPosts, find_post
+from .broker import get_broker
+from .comment_buffer import get_buffer
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .utils import paginate
+from .fragments import render_fragments
+from .group_feeds import GroupFeed, get_group
+from .models import ArchivedPost, Follow, Post, User
+from .notifications import mark_read, unread_count
+from .utils import paginate, stream_render
+
+
+def enqueue_thumbnails(post):
+    if post.image:
+        enqueue('posts.make_thumbnails', post.pk,
+                key=f'thumbnails:{post.pk}:{post.image.name}')
 
 
 # from django.views.decorators.cache import cache_page
@@ -11,16 +35,26 @@ from .utils import paginate
 
 # @cache_page(60 * 15)
 def index(request):
-    post_list = Post.objects.all()
+    post_list = TieredPosts(Post.objects.all(), ArchivedPost.objects.all())
     context = {
         'page_obj': paginate(request, post_list),
     }
     return render(request, 'posts/index.html', context)
 
 
+def popular(request):
+    post_list = Post.objects.filter(score__isnull=False).select_related(
+        'group').order_by('-score__score')
+    context = {
+        'page_obj': paginate(request, post_list),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_group(slug)
+    post_list = TieredPosts(GroupFeed(group),
+                            group.archived_posts.select_related('author'))
     context = {
         'group': group,
         'page_obj': paginate(request, post_list),
@@ -30,15 +64,13 @@ def group_posts(request, slug):
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    posts_count = author.posts.count()
-    following = (request.user.is_authenticated
-                 and author != request.user
-                 and Follow.objects.filter(author=author,
-                                           user=request.user).exists())
+    post_list = TieredPosts(author.posts.all(), author.archived_posts.all())
+    page_obj = paginate(request, post_list)
+    following = (author != request.user
+                 and request.following.is_following(author))
     context = {
-        'posts_count': posts_count,
-        'page_obj': paginate(request, post_list),
+        'posts_count': page_obj.paginator.count,
+        'page_obj': page_obj,
         'author': author,
         'following': following,
     }
@@ -46,26 +78,47 @@ def profile(request, username):
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    posts_count = Post.objects.filter(author=post.author).count()
+    post = find_post(post_id)
+    if post is None:
+        raise Http404
+    posts_count = (post.author.posts.count()
+                   + post.author.archived_posts.count())
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = post.comments.select_related('author').order_by('pk')
+    threshold = settings.COMMENTS_STREAM_THRESHOLD
+    first = list(comments[:threshold + 1])
     context = {
         'post': post,
         'posts_count': posts_count,
         'form': form,
-        'comments': comments,
+        'comments': first,
     }
-    return render(request, 'posts/post_detail.html', context)
+    if len(first) <= threshold:
+        return render(request, 'posts/post_detail.html', context)
+    return stream_render(request, 'posts/post_detail.html', context,
+                         'comments_stream', stream_comments(comments, first))
+
+
+def stream_comments(comments, first):
+    """Рендерит комментарии кусками по COMMENTS_STREAM_CHUNK."""
+    chunk = first
+    while chunk:
+        yield render_to_string('posts/includes/comments.html',
+                               {'comments': chunk})
+        chunk = list(comments.filter(pk__gt=chunk[-1].pk)
+                     [:settings.COMMENTS_STREAM_CHUNK])
 
 
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue_thumbnails(post)
+        enqueue('posts.fan_out_post', post.pk, key=f'fan_out:{post.pk}')
         return redirect('posts:profile', post.author)
     context = {
         'form': form,
@@ -86,7 +139,8 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        enqueue_thumbnails(post)
         return redirect('posts:post_detail', post.id)
     context = {
         'is_edit': is_edit,
@@ -97,20 +151,34 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
+    if form.is_valid() and settings.COMMENT_BUFFER:
+        get_buffer().add(post.pk, request.user.pk, form.cleaned_data['text'])
+    elif form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue('posts.notify_comment', comment.pk,
+                key=f'notify_comment:{comment.pk}')
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    if settings.FOLLOW_GRAPH:
+        # Id авторов уже в памяти — соединение с posts_follow не нужно.
+        authors = {'author_id__in': list(request.following)}
+    else:
+        authors = {'author__following__user': request.user}
+    post_list = TieredPosts(
+        Post.objects.filter(**authors),
+        ArchivedPost.objects.filter(**authors),
+    )
+    mark_read(request.user)
     context = {
         'page_obj': paginate(request, post_list),
     }
@@ -118,11 +186,21 @@ def follow_index(request):
 
 
 @login_required
+def unread_notifications(request):
+    return JsonResponse({'unread': unread_count(request.user)})
+
+
+@login_required
+@ratelimit('profile_follow', methods=None)
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author and (
-            not request.user.follower.filter(author=author).exists()):
-        Follow.objects.create(user=request.user, author=author)
+    if request.user != author and not request.following.is_following(author):
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=request.user, author=author)
+        except IntegrityError:
+            # Подписка уже есть: параллельный запрос или устаревший кеш.
+            pass
     return redirect('posts:profile', username=author)
 
 
@@ -131,3 +209,101 @@ def profile_unfollow(request, username):
     get_object_or_404(Follow, user=request.user,
                       author__username=username).delete()
     return redirect('posts:profile', username=username)
+
+
+def post_fragment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    return HttpResponse(render_fragments([post])[post.pk])
+
+
+def event_stream(channels, last_id):
+    """Без Last-Event-ID поток начинается с текущего конца брокера, а
+    первое сообщение сообщает его id: переподключившийся клиент пришлёт
+    его и получит пропущенное, а не всю историю."""
+    broker = get_broker()
+    if last_id is None:
+        last_id = broker.head()
+    # Поток живёт до LIVE_STREAM_TIMEOUT, а соединение вернулось бы в пул
+    # только по его окончании: отдаём его сразу и после каждого опроса.
+    connections[DEFAULT_DB_ALIAS].close()
+    deadline = time.monotonic() + settings.LIVE_STREAM_TIMEOUT
+    yield f'retry: {settings.LIVE_RETRY * 1000}\nid: {last_id}\n\n'
+    while time.monotonic() < deadline:
+        events = broker.listen(channels, last_id, settings.LIVE_HEARTBEAT)
+        connections[DEFAULT_DB_ALIAS].close()
+        if not events:
+            yield ': ping\n\n'
+        for last_id, post_id in events:
+            yield f'id: {last_id}\ndata: {post_id}\n\n'
+
+
+_live_streams = 0
+_live_streams_lock = threading.Lock()
+
+
+def acquire_stream():
+    """Занимает место под SSE-поток в процессе; False, если их уже
+    LIVE_MAX_STREAMS."""
+    global _live_streams
+    with _live_streams_lock:
+        if _live_streams >= settings.LIVE_MAX_STREAMS:
+            return False
+        _live_streams += 1
+        return True
+
+
+def release_stream():
+    global _live_streams
+    with _live_streams_lock:
+        _live_streams -= 1
+
+
+class LiveStream:
+    """Отдаёт место потока при закрытии ответа: генератор, который не
+    успели запустить, свой finally не выполняет."""
+
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.events.close()
+            release_stream()
+
+
+def live_response(request, channels):
+    if not acquire_stream():
+        response = HttpResponse(status=503)
+        response['Retry-After'] = settings.LIVE_RETRY
+        return response
+    try:
+        last_id = int(request.META['HTTP_LAST_EVENT_ID'])
+    except (KeyError, ValueError):
+        last_id = None
+    response = StreamingHttpResponse(
+        LiveStream(event_stream(channels, last_id)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_index(request):
+    return live_response(request, ['index'])
+
+
+def live_group(request, slug):
+    group = get_group(slug)
+    return live_response(request, [f'group:{group.slug}'])
+
+
+@login_required
+def live_follow(request):
+    return live_response(
+        request, [f'author:{pk}' for pk in request.following])
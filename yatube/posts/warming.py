@@ -0,0 +1,115 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.storage import default_storage
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+
+from . import images
+from .models import Group, Post, User
+
+
+def page_urls(pages, groups, profiles):
+    """Первые страницы главной, самых больших групп и профилей самых
+    читаемых авторов."""
+    paths = [reverse('posts:main')]
+    paths += [
+        reverse('posts:group_list', args=[slug])
+        for slug in Group.objects.annotate(size=Count('posts')).order_by(
+            '-size').values_list('slug', flat=True)[:groups]
+    ]
+    paths += [
+        reverse('posts:profile', args=[username])
+        for username in User.objects.annotate(
+            followers=Count('following')).order_by(
+                '-followers').values_list('username', flat=True)[:profiles]
+    ]
+    return [
+        path if page == 1 else f'{path}?page={page}'
+        for path in paths for page in range(1, pages + 1)
+    ]
+
+
+def cache_is_local():
+    """Кеш живёт в памяти процесса: страницы, отрендеренные в команде,
+    воркерам не достанутся."""
+    return isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_handler():
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def fetch(handler, host, url):
+    """Рендерит страницу через middleware как анонимный посетитель.
+    Возвращает статус и время в секундах."""
+    request = RequestFactory(HTTP_HOST=host).get(url)
+    start = time.perf_counter()
+    try:
+        response = handler.get_response(request)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code, time.perf_counter() - start
+    finally:
+        connections.close_all()
+
+
+def warm_pages(urls, host, workers=0):
+    handler = get_handler()
+
+    def render(url):
+        return fetch(handler, host, url)
+
+    if not workers:
+        return {url: render(url) for url in urls}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(urls, executor.map(render, urls)))
+
+
+def recent_images(limit):
+    return list(Post.objects.exclude(image='').order_by(
+        '-pub_date').values_list('image', flat=True)[:limit])
+
+
+def make_thumbnails(name):
+    """Готовит все варианты картинки; возвращает текст ошибки или None.
+    sorl не бросает исключение на битом исходнике, а отдаёт несозданную
+    миниатюру, поэтому наличие файла проверяется явно."""
+    try:
+        for width, format_ in images.variants():
+            if not images.thumbnail(name, width, format_).exists():
+                return f'{format_} {width}w не создана'
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+    finally:
+        connections.close_all()
+    return None
+
+
+def count_thumbnails():
+    from sorl.thumbnail.conf import settings as thumbnail_settings
+    directory = default_storage.path(thumbnail_settings.THUMBNAIL_PREFIX)
+    return sum(len(files) for _, _, files in os.walk(directory))
+
+
+def warm_thumbnails(names, workers):
+    """Генерирует недостающие миниатюры в пуле процессов. Соединения
+    с базой закрываются до fork, чтобы потомки открыли свои."""
+    connections.close_all()
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            errors = list(executor.map(make_thumbnails, names))
+    else:
+        errors = [make_thumbnails(name) for name in names]
+    return dict(zip(names, errors))
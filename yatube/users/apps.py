@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.contrib.auth.password_validation import (
+    get_default_password_validators)
 
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        # Загружаем валидаторы и список частых паролей до первой
+        # регистрации, а при preload — ещё до форка воркеров.
+        get_default_password_validators()
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """scrypt из стандартной библиотеки. Стоимость задаётся настройками
+    PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R и PASSWORD_SCRYPT_P; при их
+    изменении пароль перехешируется при следующем входе."""
+    algorithm = 'scrypt'
+
+    @property
+    def params(self):
+        return (settings.PASSWORD_SCRYPT_N, settings.PASSWORD_SCRYPT_R,
+                settings.PASSWORD_SCRYPT_P)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        default_n, default_r, default_p = self.params
+        n, r, p = n or default_n, r or default_r, p or default_p
+        hash = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            maxmem=256 * n * r * p, dklen=64,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return f'{self.algorithm}${n}${salt}${r}${p}${hash}'
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return int(n), salt, int(r), int(p), hash
+
+    def verify(self, password, encoded):
+        n, salt, r, p, _ = self.decode(encoded)
+        return constant_time_compare(
+            encoded, self.encode(password, salt, n, r, p))
+
+    def safe_summary(self, encoded):
+        n, salt, r, p, hash = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), self.algorithm),
+            (_('work factor'), n),
+            (_('block size'), r),
+            (_('parallelism'), p),
+            (_('salt'), hashers.mask_hash(salt)),
+            (_('hash'), hashers.mask_hash(hash)),
+        ])
+
+    def must_update(self, encoded):
+        n, salt, r, p, hash = self.decode(encoded)
+        return (n, r, p) != self.params
+
+    def harden_runtime(self, password, encoded):
+        # Стоимость scrypt нельзя «добрать» частично, как итерации PBKDF2.
+        pass
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 с параметрами из настроек PASSWORD_ARGON2_*. Требует пакет
+    argon2-cffi."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
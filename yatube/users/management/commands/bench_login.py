@@ -0,0 +1,45 @@
+import time
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = 'correct horse battery staple'
+
+
+def _checks(args):
+    encoded, duration = args
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        check_password(PASSWORD, encoded)
+        done += 1
+    return done
+
+
+class Command(BaseCommand):
+    help = ('Замеряет число проверок пароля в секунду для хешеров из '
+            'PASSWORD_HASHERS — основную стоимость входа.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=3)
+        parser.add_argument('--processes', type=int, default=1)
+
+    def handle(self, *args, **options):
+        processes, duration = options['processes'], options['duration']
+        for path in settings.PASSWORD_HASHERS:
+            try:
+                hasher = import_string(path)()
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except (ValueError, TypeError):
+                self.stdout.write(f'{path}: недоступен')
+                continue
+            with Pool(processes) as pool:
+                total = sum(pool.map(
+                    _checks, [(encoded, duration)] * processes))
+            rate = total / duration
+            self.stdout.write(
+                f'{hasher.algorithm}: {rate:.1f} входов/с, '
+                f'{rate / processes:.1f} на ядро')
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.test import Client, TestCase, override_settings
+
+from ..hashers import ScryptPasswordHasher
+from ..validators import CommonPasswordValidator
+
+User = get_user_model()
+
+PASSWORD = 'Xq7-secret-pass'
+
+
+@override_settings(PASSWORD_SCRYPT_N=2 ** 10)
+class PasswordHasherTests(TestCase):
+    def test_scrypt_encode_verify(self):
+        """scrypt проверяет только верный пароль."""
+        hasher = ScryptPasswordHasher()
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        self.assertTrue(encoded.startswith('scrypt$1024$'))
+        self.assertTrue(hasher.verify(PASSWORD, encoded))
+        self.assertFalse(hasher.verify(PASSWORD + '1', encoded))
+        with self.settings(PASSWORD_SCRYPT_N=2 ** 11):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_login_rehashes_old_password(self):
+        """Пароль в PBKDF2 перехешируется в scrypt при входе."""
+        user = User.objects.create(
+            username='user',
+            password=make_password(PASSWORD, hasher='pbkdf2_sha256'),
+        )
+        self.assertTrue(Client().login(username='user', password=PASSWORD))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+
+class CommonPasswordValidatorTests(TestCase):
+    def test_password_list_is_shared(self):
+        """Список частых паролей загружается один раз."""
+        first, second = CommonPasswordValidator(), CommonPasswordValidator()
+        self.assertIs(first.passwords, second.passwords)
+        self.assertIsInstance(first.passwords, frozenset)
+        with self.assertRaises(ValidationError):
+            first.validate('password')
@@ -0,0 +1,18 @@
+import functools
+
+from django.contrib.auth import password_validation
+
+
+@functools.lru_cache(maxsize=None)
+def load_passwords(path):
+    return frozenset(
+        password_validation.CommonPasswordValidator(path).passwords)
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """Список частых паролей читается один раз на процесс и хранится как
+    frozenset, общий для всех экземпляров валидатора."""
+
+    def __init__(self, password_list_path=None):
+        self.passwords = load_passwords(
+            password_list_path or self.DEFAULT_PASSWORD_LIST_PATH)
@@ -17,12 +17,141 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 POSTS_ON_PAGE = 10
+POSTS_EXACT_COUNT_LIMIT = 1000
+POSTS_COUNT_CACHE_TIMEOUT = 60
+PAGINATOR_WINDOW = 3
+# Посты старше стольких дней переносятся в архив командой archive_posts.
+POSTS_ARCHIVE_AFTER_DAYS = 90
+POSTS_ARCHIVE_CHUNK_SIZE = 1000
+# Сколько живут версия архива и подсчёты архивных постов в кеше.
+POSTS_ARCHIVE_CACHE_TIMEOUT = 60 * 5
 TRUNCATE_TEXT_LENGTH = 15
+ADMIN_TEXT_LENGTH = 50
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main'
 # LOGOUT_REDIRECT_URL = 'posts:main'
 
+POST_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+# Версии авторов и групп в ключах карточек: при нескольких процессах
+# кеш должен быть общим, иначе переименование увидит только один.
+POST_FRAGMENT_VERSION_CACHE = 'default'
+
+# Популярные посты: вклад комментария и подписчика автора затухает
+# вдвое за RANKING_HALF_LIFE секунд; ранжируются посты за последние
+# RANKING_WINDOW_DAYS дней (пересчёт — manage.py rank_posts).
+RANKING_HALF_LIFE = 60 * 60 * 24
+RANKING_COMMENT_WEIGHT = 1.0
+RANKING_FOLLOWER_WEIGHT = 0.1
+RANKING_WINDOW_DAYS = 7
+RANKING_BATCH_SIZE = 500
+
+# Рекомендации подписок (manage.py compute_recommendations).
+RECOMMENDATIONS_TOP = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_BATCH_SIZE = 500
+RECOMMENDATIONS_WORKERS = 2
+
+# Лента группы: первые GROUP_FEED_SIZE id постов держатся в кеше
+# GROUP_FEED_CACHE — общем для воркеров, чтобы новый пост и
+# переименование группы были видны всем процессам сразу.
+GROUP_FEED_CACHE = 'default'
+GROUP_FEED_SIZE = 100
+GROUP_FEED_CACHE_TIMEOUT = 60 * 10
+GROUP_CACHE_TIMEOUT = 60 * 60
+
+# Варианты картинок постов: ширины для srcset, пропорции кадра и форматы
+# сверх JPEG (берутся только те, что поддерживает установленный Pillow).
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP')
+POST_IMAGE_QUALITY = 80
+POST_IMAGE_SIZES = '(min-width: 768px) 75vw, 100vw'
+
+# Kvstore sorl с картой записей в памяти процесса (posts.kvstore): лента
+# подгружает миниатюры страницы разом и не ходит за ними в кеш и базу.
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_MEMORY_SIZE = 50000
+
+# Подписки пользователя кешируются в кеше FOLLOWING_CACHE и сбрасываются
+# сигналами Follow. Сброс должен дойти до всех воркеров, поэтому в
+# продакшене это общий кеш 'shared' (settings_production).
+FOLLOWING_CACHE = 'default'
+FOLLOWING_CACHE_TIMEOUT = 60 * 10
+
+# Прогрев после деплоя (manage.py warm_caches): первые страницы главной,
+# самых больших групп и самых читаемых авторов, миниатюры свежих постов.
+# С кешем в памяти процесса страницы прогреваются при старте воркера
+# (WARM_UP_PAGES вместе с WARM_UP_ON_STARTUP), а не командой. Страницы
+# запрашиваются с хостом WARM_CACHES_HOST, он должен быть в ALLOWED_HOSTS.
+WARM_CACHES_HOST = 'localhost'
+WARM_CACHES_PAGES = 2
+WARM_CACHES_GROUPS = 10
+WARM_CACHES_PROFILES = 20
+WARM_CACHES_THUMBNAILS = 200
+WARM_CACHES_WORKERS = 4
+WARM_CACHES_THUMBNAIL_WORKERS = 2
+
+# Граф подписок в памяти процесса вместо запросов к posts_follow.
+# Изменения из других процессов приходят через журнал в общем кеше,
+# который опрашивается не чаще раза в FOLLOW_GRAPH_POLL_INTERVAL секунд,
+# поэтому при нескольких воркерах нужен общий кеш (Memcached, Redis).
+FOLLOW_GRAPH = False
+FOLLOW_GRAPH_POLL_INTERVAL = 1
+FOLLOW_GRAPH_EVENT_TIMEOUT = 60 * 60 * 24
+FOLLOW_GRAPH_MAX_EVENTS = 10000
+FOLLOW_GRAPH_CHUNK_SIZE = 10000
+
+# Ограничения частоты пишущих запросов: (запросов, секунд) на
+# пользователя и на IP. Счётчики живут в кеше RATELIMIT_CACHE: при
+# нескольких воркерах он должен быть общим и с атомарным incr, иначе
+# каждый воркер пропускает свой полный лимит.
+RATELIMIT_ENABLED = True
+RATELIMIT_CACHE = 'default'
+# Сколько доверенных прокси стоит перед приложением: за прокси у всех
+# запросов один REMOTE_ADDR, и IP клиента берётся из X-Forwarded-For.
+RATELIMIT_PROXY_COUNT = 0
+RATELIMITS = {
+    'post_create': {'user': (10, 60), 'ip': (60, 60)},
+    'add_comment': {'user': (30, 60), 'ip': (120, 60)},
+    'profile_follow': {'user': (60, 60), 'ip': (300, 60)},
+}
+
+NOTIFICATIONS_BATCH_SIZE = 1000
+# Счётчики непрочитанных сбрасываются из run_workers, поэтому при
+# нескольких процессах кеш должен быть общим.
+NOTIFICATIONS_CACHE = 'default'
+NOTIFICATIONS_CACHE_TIMEOUT = 60 * 5
+
+LIVE_BROKER = 'posts.broker.LocalBroker'
+LIVE_HISTORY = 1000
+LIVE_POLL_INTERVAL = 2
+LIVE_HEARTBEAT = 15
+LIVE_RETRY = 3
+# Каждый SSE-поток занимает поток воркера, пока открыт, поэтому live-ленты
+# требуют многопоточного (gunicorn --threads, gthread) или асинхронного
+# сервера. Потоков на процесс не больше LIVE_MAX_STREAMS, остальные
+# получают 503 и переподключаются через LIVE_RETRY секунд. Поток короткий:
+# EventSource сам переподключается с Last-Event-ID и ничего не теряет.
+LIVE_MAX_STREAMS = 8
+LIVE_STREAM_TIMEOUT = 60
+
+MODERATION_CHUNK_SIZE = 1000
+# Сколько id постов попадает в аргументы одной фоновой задачи.
+MODERATION_TASK_SIZE = 10000
+
+TASKS_EAGER = False
+TASKS_WORKERS = 2
+TASKS_POLL_INTERVAL = 1
+TASKS_MAX_ATTEMPTS = 3
+TASKS_RETRY_DELAY = 10
+# Выполняемая задача раз в TASKS_HEARTBEAT секунд отмечается живой;
+# задача без отметки дольше TASKS_STALE_AFTER считается зависшей.
+TASKS_HEARTBEAT = 30
+TASKS_STALE_AFTER = 120
+# Как часто воркеры ищут зависшие задачи, в секундах.
+TASKS_REQUEUE_INTERVAL = 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -60,14 +189,58 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.FollowingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Профилирование запросов: доля случайных запросов (0 — только по
+# заголовку X-Profile с токеном из manage.py profile_token <username>,
+# который действует только для этого пользователя), режим 'sample'
+# (стеки для flamegraph) или 'cprofile'. Middleware стоит после
+# аутентификации, чтобы проверить владельца токена.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_MODE = 'sample'
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_TOKEN_MAX_AGE = 60 * 10
+
+# Сжатие ответов: (до скольки байт, уровень gzip, уровень brotli). Строка
+# с None — для остальных, в том числе потоковых, ответов.
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_LEVELS = (
+    (16 * 1024, 9, 9),
+    (256 * 1024, 6, 5),
+    (None, 4, 4),
+)
+
+# Комментарии к посту отдаются потоком кусками, если их больше порога.
+COMMENTS_STREAM_THRESHOLD = 100
+COMMENTS_STREAM_CHUNK = 100
+
+# Буфер комментариев: запись пачками раз в COMMENT_BUFFER_INTERVAL секунд
+# или по набору COMMENT_BUFFER_BATCH_SIZE. До записи комментарии лежат в
+# журнале процесса в COMMENT_BUFFER_DIR.
+COMMENT_BUFFER = False
+COMMENT_BUFFER_DIR = os.path.join(BASE_DIR, 'comment_journal')
+COMMENT_BUFFER_INTERVAL = 0.2
+COMMENT_BUFFER_BATCH_SIZE = 200
+COMMENT_BUFFER_FSYNC = True
+
+# Анонимные сессии — в подписанной куке, сессии после входа — в кеше с
+# записью в БД. Неизменённые сессии не сохраняются. Кеш сессий должен
+# быть общим для воркеров: иначе выход из аккаунта увидит только тот
+# процесс, который его обработал.
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'default'
+SESSION_SAVE_EVERY_REQUEST = False
+
 ROOT_URLCONF = 'yatube.urls'
 
 # Путь к директории с шаблонами вынесен в переменную:
@@ -85,20 +258,33 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.unread',
+                'core.context_processors.following.following',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+WARM_UP_ON_STARTUP = False
+WARM_UP_PAGES = False
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Соединения берутся из пула процесса на время запроса (CONN_MAX_AGE = 0)
+# и возвращаются в него; для PostgreSQL — core.db.backends.postgresql.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'POOL': {
+            'MIN_SIZE': 1,
+            'MAX_SIZE': 10,
+            'TIMEOUT': 5,
+            'CHECK_AFTER': 30,
+            'MAX_IDLE': 300,
+        },
     }
 }
 
@@ -113,13 +299,33 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'users.validators.CommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
 
+# Первый хешер используется для новых паролей, остальные — для проверки
+# старых. При входе пароль перехешируется, если он записан другим хешером
+# или с другой стоимостью. Для Argon2 (нужен argon2-cffi) поставьте
+# users.hashers.Argon2PasswordHasher первым.
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'users.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_SCRYPT_N = 2 ** 14
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 512
+PASSWORD_ARGON2_PARALLELISM = 2
+
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -137,9 +343,15 @@ USE_TZ = False  # отключил поддержку часовых поясо
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Раздача статики и медиа WSGI-обёрткой core.static.StaticFilesApp.
+SERVE_STATIC = False
+STATIC_MAX_AGE = 60 * 60
+MEDIA_MAX_AGE = 60 * 60 * 24
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
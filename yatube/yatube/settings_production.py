@@ -0,0 +1,73 @@
+"""
+Облегчённый профиль для веб-воркеров:
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production
+
+Админка и messages подключаются только при YATUBE_ADMIN=1 (отдельный пул
+воркеров для /admin/). Шаблоны кешируются, URL-резолвер, шаблоны и
+переводы прогреваются при импорте wsgi.py, до форка воркеров.
+Статика собирается collectstatic с хешами в именах и сжатыми копиями и
+вместе с медиа раздаётся из wsgi.py, минуя Django.
+
+sorl.thumbnail остаётся в INSTALLED_APPS и веб-процессами не
+откладывается: шаблоны с {% load thumbnail %} и kvstore posts.kvstore
+загружают его при прогреве. До первой миниатюры откладывается только
+Pillow.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES, INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+ADMIN_ENABLED = os.environ.get('YATUBE_ADMIN') == '1'
+
+if not ADMIN_ENABLED:
+    ADMIN_ONLY_APPS = ('django.contrib.admin', 'django.contrib.messages')
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in ADMIN_ONLY_APPS]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware != 'django.contrib.messages.middleware.MessageMiddleware'
+    ]
+    TEMPLATES = [dict(TEMPLATES[0], OPTIONS=dict(
+        TEMPLATES[0]['OPTIONS'],
+        context_processors=[
+            processor
+            for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+            if processor != ('django.contrib.messages.context_processors.'
+                             'messages')
+        ],
+    ))]
+
+# Кеш, общий для воркеров на этой машине: ключи, которые сбрасываются
+# из другого процесса. При нескольких машинах — Memcached или Redis.
+CACHES = dict(CACHES, shared={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.environ.get(
+        'YATUBE_SHARED_CACHE_DIR', os.path.join(BASE_DIR, 'shared_cache')),
+})
+FOLLOWING_CACHE = 'shared'
+NOTIFICATIONS_CACHE = 'shared'
+POST_FRAGMENT_VERSION_CACHE = 'shared'
+GROUP_FEED_CACHE = 'shared'
+SESSION_CACHE_ALIAS = 'shared'
+
+# Счётчики лимитов — в Memcached (нужен python-memcached): incr в нём
+# атомарен, а в FileBasedCache это get и set, и параллельные запросы
+# теряли бы попытки.
+CACHES = dict(CACHES, counters={
+    'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+    'LOCATION': os.environ.get('YATUBE_MEMCACHED', '127.0.0.1:11211'),
+})
+RATELIMIT_CACHE = 'counters'
+# Воркеры стоят за обратным прокси (nginx), дописывающим X-Forwarded-For.
+RATELIMIT_PROXY_COUNT = int(os.environ.get('YATUBE_PROXY_COUNT', 1))
+
+WARM_UP_ON_STARTUP = True
+WARM_UP_PAGES = True
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+SERVE_STATIC = True
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.SERVE_STATIC:
+    from core.static import StaticFilesApp
+
+    application = StaticFilesApp(application)
+
+if settings.WARM_UP_ON_STARTUP:
+    from core.warmup import warm_up
+
+    warm_up()